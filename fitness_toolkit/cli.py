@@ -143,10 +143,10 @@ def sync(platform, file_format):
 @click.option('--port', default=5000, help='Port to bind to')
 def web(host, port):
     """Start the web UI."""
-    from fitness_toolkit.web.app import create_app
+    from fitness_toolkit.web.app import create_app, serve
     app = create_app()
     click.echo(f"Starting web server at http://{host}:{port}")
-    app.run(host=host, port=port, debug=False)
+    serve(app, host, port)
 
 
 @cli.command()
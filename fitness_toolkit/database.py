@@ -1,28 +1,80 @@
 """Database module for SQLite operations."""
 
+import json
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 from fitness_toolkit.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Each thread keeps one open connection, reused by every query on that thread
+_local = threading.local()
+# Writers take turns; WAL lets readers carry on meanwhile
+_write_lock = threading.RLock()
+
 
 def get_connection():
-    """Get a database connection with WAL mode enabled."""
+    """Get this thread's database connection, opening it on first use.
+
+    The connection is reused for as long as Config.DATABASE_PATH stays the
+    same; use it as a context manager to commit or roll back, not to close it.
+    DATABASE_PATH may also be a "file:" URI, e.g. a shared in-memory database
+    ("file:name?mode=memory&cache=shared").
+    """
+    path = str(Config.DATABASE_PATH)
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        if _local.path == path:
+            return conn
+        conn.close()
+
     Config.ensure_directories()
-    conn = sqlite3.connect(Config.DATABASE_PATH)
+    conn = sqlite3.connect(path, uri=path.startswith("file:"))
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    # Safe with WAL: a crash can lose the last commits but never corrupts
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Enforce the transfer_items -> transfer_jobs cascade, keep temp tables in
+    # memory and give each connection a ~16 MB page cache. sqlite3.connect
+    # already waits up to 5 s on a locked database (busy_timeout).
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-16000")
+    _local.conn = conn
+    _local.path = path
     return conn
 
 
+@contextmanager
+def write_connection():
+    """Get this thread's connection for a write, one writing thread at a time.
+
+    Waiting on a lock is cheaper than SQLite's busy-retry loop when the web
+    server and transfer worker write together. Commits on success and rolls
+    back on error, like using get_connection() as a context manager.
+    """
+    with _write_lock, get_connection() as conn:
+        yield conn
+
+
+def close_connection():
+    """Close this thread's database connection, if one is open."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
 def init_db():
     """Initialize the database with required tables."""
     Config.ensure_directories()
     
-    with get_connection() as conn:
+    with write_connection() as conn:
+        # WAL is stored in the database file, so it only needs setting once
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         
         # Accounts table - platform as primary key (one account per platform)
@@ -149,6 +201,15 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_transfer_items_job_status 
             ON transfer_items(job_id, status)
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transfer_items_job_metadata
+            ON transfer_items(job_id, metadata_status)
+        """)
+        # Newest-first history pages per type (ids increase with created_at)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_operation_history_type_id
+            ON operation_history(operation_type, id)
+        """)
         
         conn.commit()
         logger.info("Database initialized successfully")
@@ -157,7 +218,7 @@ def init_db():
 # Account operations
 def save_account(platform, email, password_encrypted):
     """Save or update account for a platform."""
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """INSERT INTO accounts (platform, email, password_encrypted) 
@@ -190,7 +251,7 @@ def list_accounts():
 
 def delete_account(platform):
     """Delete account for a platform."""
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM accounts WHERE platform = ?", (platform,))
         conn.commit()
@@ -205,7 +266,7 @@ def has_account(platform):
 # Download history operations
 def add_download_history(platform, activity_id, activity_type, file_path, file_format):
     """Add a download history record."""
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """INSERT INTO download_history 
@@ -233,7 +294,7 @@ def get_download_history(platform=None):
 # Sync task operations
 def save_sync_task(platform, enabled, cron_expression, file_format='tcx', activity_types=None):
     """Save or update sync task for a platform."""
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """INSERT INTO sync_tasks (platform, enabled, cron_expression, file_format, activity_types) 
@@ -268,7 +329,7 @@ def list_sync_tasks():
 
 def delete_sync_task(platform):
     """Delete sync task for a platform."""
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM sync_tasks WHERE platform = ?", (platform,))
         conn.commit()
@@ -277,8 +338,7 @@ def delete_sync_task(platform):
 
 def save_operation_history(operation_type, platform, start_date, end_date, total, success, skipped, failed, details=None):
     """Save an operation history record."""
-    import json
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """INSERT INTO operation_history 
@@ -291,18 +351,37 @@ def save_operation_history(operation_type, platform, start_date, end_date, total
         return cursor.lastrowid
 
 
+def save_operation_history_many(rows):
+    """Save several operation history records in one transaction.
+
+    Each row is a dict with the keyword arguments of save_operation_history.
+    """
+    with write_connection() as conn:
+        conn.executemany(
+            """INSERT INTO operation_history 
+               (operation_type, platform, start_date, end_date, total, success, skipped, failed, details)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (row['operation_type'], row['platform'], row['start_date'], row['end_date'],
+                 row['total'], row['success'], row['skipped'], row['failed'],
+                 json.dumps(row['details']) if row.get('details') else None)
+                for row in rows
+            ]
+        )
+        conn.commit()
+
+
 def get_operation_history(operation_type=None, limit=50):
     """Get operation history, optionally filtered by type."""
-    import json
     with get_connection() as conn:
         cursor = conn.cursor()
         if operation_type:
             cursor.execute(
-                "SELECT * FROM operation_history WHERE operation_type = ? ORDER BY created_at DESC LIMIT ?",
+                "SELECT * FROM operation_history WHERE operation_type = ? ORDER BY id DESC LIMIT ?",
                 (operation_type, limit)
             )
         else:
-            cursor.execute("SELECT * FROM operation_history ORDER BY created_at DESC LIMIT ?", (limit,))
+            cursor.execute("SELECT * FROM operation_history ORDER BY id DESC LIMIT ?", (limit,))
         rows = [dict(row) for row in cursor.fetchall()]
         for row in rows:
             if row.get('details'):
@@ -319,7 +398,7 @@ def delete_operation_history(record_id: int) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM operation_history WHERE id = ?", (record_id,))
         conn.commit()
@@ -329,7 +408,6 @@ def delete_operation_history(record_id: int) -> bool:
 # Transfer settings operations (singleton row with id=1)
 def get_transfer_settings() -> "dict | None":
     """Get transfer settings. Returns None if not initialized."""
-    import json
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT settings_json FROM transfer_settings WHERE id = 1")
@@ -341,9 +419,8 @@ def get_transfer_settings() -> "dict | None":
 
 def save_transfer_settings(settings: dict) -> None:
     """Save transfer settings (upsert singleton row)."""
-    import json
     settings_json = json.dumps(settings, ensure_ascii=False)
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """INSERT INTO transfer_settings (id, settings_json)
@@ -27,6 +27,8 @@ class AccountService:
         """Configure account for a platform."""
         encrypted_password = encrypt_password(password)
         db_save_account(platform, email, encrypted_password)
+        # Drop any client logged in with the old credentials
+        self._clients.pop(platform, None)
         logger.info(f"Configured {platform} account for {email}")
     
     def list_accounts(self) -> list:
@@ -16,8 +16,8 @@ logger = logging.getLogger(__name__)
 class DownloadService:
     """Service for downloading activities from platforms."""
     
-    def __init__(self):
-        self.account_service = AccountService()
+    def __init__(self, account_service: Optional[AccountService] = None):
+        self.account_service = account_service or AccountService()
     
     def download(
         self,
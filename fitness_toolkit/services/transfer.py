@@ -2,7 +2,7 @@ import logging
 import tempfile
 from datetime import date
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 
 from fitness_toolkit.clients.coros import CorosClient
 from fitness_toolkit.clients.garmin import GarminClient
@@ -13,8 +13,8 @@ logger = logging.getLogger(__name__)
 
 
 class TransferService:
-    def __init__(self):
-        self.account_service = AccountService()
+    def __init__(self, account_service: Optional[AccountService] = None):
+        self.account_service = account_service or AccountService()
 
     def transfer(
         self,
@@ -23,6 +23,30 @@ class TransferService:
         sport_types: Optional[List[str]] = None,
         save_dir: Optional[Path] = None,
     ) -> Dict[str, Any]:
+        results, activity_results = self.iter_transfer(
+            start_date, end_date, sport_types, save_dir
+        )
+        for _ in activity_results:
+            pass
+        return results
+
+    def iter_transfer(
+        self,
+        start_date: date,
+        end_date: date,
+        sport_types: Optional[List[str]] = None,
+        save_dir: Optional[Path] = None,
+    ) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Start a transfer that runs as the returned iterator is consumed.
+
+        Clients are logged in and the activity list is fetched before this
+        returns, so configuration errors are raised here rather than midway.
+
+        Returns:
+            Tuple of (summary dict, updated as each activity finishes; iterator
+            yielding each activity's result)
+        """
         coros_client = self.account_service.get_client("coros")
         garmin_client = self.account_service.get_client("garmin")
 
@@ -53,6 +77,18 @@ class TransferService:
             "activities": [],
         }
 
+        return results, self._transfer_activities(
+            coros_client, garmin_client, activities, save_dir, results
+        )
+
+    def _transfer_activities(
+        self,
+        coros_client: CorosClient,
+        garmin_client: GarminClient,
+        activities: List[Dict[str, Any]],
+        save_dir: Path,
+        results: Dict[str, Any],
+    ) -> Iterator[Dict[str, Any]]:
         for activity in activities:
             activity_result = self._transfer_single_activity(
                 coros_client, garmin_client, activity, save_dir
@@ -67,13 +103,13 @@ class TransferService:
             else:
                 results["failed"].append(activity_result)
 
+            yield activity_result
+
         logger.info(
             f"Transfer complete: {results['uploaded']} uploaded, "
             f"{results['skipped']} skipped, {len(results['failed'])} failed"
         )
 
-        return results
-
     def _transfer_single_activity(
         self,
         coros_client: CorosClient,
@@ -5,7 +5,7 @@ import logging
 from datetime import datetime
 from typing import Any, Optional
 
-from fitness_toolkit.database import get_connection
+from fitness_toolkit.database import get_connection, write_connection
 from fitness_toolkit.services.transfer_settings import TransferSettingsService
 
 logger = logging.getLogger(__name__)
@@ -32,6 +32,97 @@ METADATA_STATUS_SUCCESS = "success"
 METADATA_STATUS_FAILED = "failed"
 METADATA_STATUS_SKIPPED = "skipped"
 
+# Columns of transfer_items that callers may select with get_job_items(fields=...)
+ITEM_FIELDS = (
+    "id",
+    "job_id",
+    "label_id",
+    "sport_type",
+    "activity_name",
+    "activity_time",
+    "status",
+    "retry_count",
+    "local_path",
+    "garmin_id",
+    "error_message",
+    "metadata_status",
+    "metadata_error",
+    "created_at",
+    "updated_at",
+)
+
+_SQL_ITEMS_BY_JOB = """SELECT {columns} FROM transfer_items
+   WHERE job_id = ? AND id > ?
+   ORDER BY id
+   LIMIT ?"""
+
+_SQL_ITEMS_BY_JOB_STATUS = """SELECT {columns} FROM transfer_items
+   WHERE job_id = ? AND status = ? AND id > ?
+   ORDER BY id
+   LIMIT ?"""
+
+_SQL_COUNT_ITEMS = """SELECT
+       COUNT(*) as total,
+       SUM(CASE WHEN status IN (?, ?, ?) THEN 1 ELSE 0 END) as completed,
+       SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as success,
+       SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as skipped,
+       SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as failed
+   FROM transfer_items
+   WHERE job_id = ?"""
+
+_SQL_UPDATE_JOB_COUNTS = """UPDATE transfer_jobs
+   SET total_items = ?, completed_items = ?,
+       success_count = ?, skipped_count = ?, failed_count = ?
+   WHERE id = ?"""
+
+
+def _item_columns(fields: Optional[list[str]]) -> str:
+    """Build the SELECT column list for item queries ("id" always included).
+
+    Raises:
+        ValueError: If fields names a column not in ITEM_FIELDS
+    """
+    if not fields:
+        return "*"
+    unknown = [field for field in fields if field not in ITEM_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown item fields: {', '.join(unknown)}")
+    return ", ".join(dict.fromkeys(["id", *fields]))
+
+
+def _job_from_row(row) -> dict[str, Any]:
+    """Convert a transfer_jobs row to a job dict, parsing its JSON fields."""
+    job = dict(row)
+    if job.get("sport_types"):
+        job["sport_types"] = json.loads(job["sport_types"])
+    if job.get("settings_snapshot"):
+        job["settings_snapshot"] = json.loads(job["settings_snapshot"])
+    return job
+
+
+def _count_items(cursor, job_id: int) -> dict[str, int]:
+    """Count a job's items by status, keyed like the transfer_jobs columns."""
+    cursor.execute(
+        _SQL_COUNT_ITEMS,
+        (
+            ITEM_STATUS_SUCCESS,
+            ITEM_STATUS_SKIPPED,
+            ITEM_STATUS_FAILED,
+            ITEM_STATUS_SUCCESS,
+            ITEM_STATUS_SKIPPED,
+            ITEM_STATUS_FAILED,
+            job_id,
+        ),
+    )
+    row = cursor.fetchone()
+    return {
+        "total_items": row["total"] or 0,
+        "completed_items": row["completed"] or 0,
+        "success_count": row["success"] or 0,
+        "skipped_count": row["skipped"] or 0,
+        "failed_count": row["failed"] or 0,
+    }
+
 
 class TransferQueueService:
     """Service for managing async transfer jobs and items."""
@@ -64,7 +155,7 @@ class TransferQueueService:
 
         sport_types_json = json.dumps(sport_types) if sport_types else None
 
-        with get_connection() as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
 
             # Create job
@@ -86,11 +177,11 @@ class TransferQueueService:
                 raise RuntimeError("Failed to create job: no lastrowid returned")
 
             # Create items
-            for activity in activities:
-                cursor.execute(
-                    """INSERT INTO transfer_items
-                       (job_id, label_id, sport_type, activity_name, activity_time, status)
-                       VALUES (?, ?, ?, ?, ?, ?)""",
+            cursor.executemany(
+                """INSERT INTO transfer_items
+                   (job_id, label_id, sport_type, activity_name, activity_time, status)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [
                     (
                         job_id,
                         activity.get("labelId", ""),
@@ -98,11 +189,13 @@ class TransferQueueService:
                         activity.get("name", ""),
                         activity.get("startTime", ""),
                         ITEM_STATUS_PENDING,
-                    ),
-                )
+                    )
+                    for activity in activities
+                ],
+            )
 
             conn.commit()
-            logger.info(f"Created transfer job {job_id} with {len(activities)} items")
+            logger.info("Created transfer job %s with %d items", job_id, len(activities))
             return job_id
 
     def get_job(self, job_id: int) -> Optional[dict[str, Any]]:
@@ -118,16 +211,23 @@ class TransferQueueService:
             row = cursor.fetchone()
             if not row:
                 return None
+            return _job_from_row(row)
 
-            job = dict(row)
-
-            # Parse JSON fields
-            if job.get("sport_types"):
-                job["sport_types"] = json.loads(job["sport_types"])
-            if job.get("settings_snapshot"):
-                job["settings_snapshot"] = json.loads(job["settings_snapshot"])
+    def get_next_pending_job(self) -> Optional[dict[str, Any]]:
+        """
+        Get the oldest pending job (for worker to process).
 
-            return job
+        Returns:
+            Job dict or None if no job is pending
+        """
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id FROM transfer_jobs WHERE status = ? ORDER BY id LIMIT 1",
+                (JOB_STATUS_PENDING,),
+            )
+            row = cursor.fetchone()
+        return self.get_job(row["id"]) if row else None
 
     def list_jobs(self, limit: int = 20) -> list[dict[str, Any]]:
         """
@@ -146,7 +246,7 @@ class TransferQueueService:
                           total_items, completed_items, success_count, skipped_count, 
                           failed_count, error_message, created_at, started_at, completed_at
                    FROM transfer_jobs
-                   ORDER BY created_at DESC
+                   ORDER BY id DESC
                    LIMIT ?""",
                 (limit,),
             )
@@ -163,6 +263,8 @@ class TransferQueueService:
         job_id: int,
         status: Optional[str] = None,
         limit: int = 100,
+        after_id: int = 0,
+        fields: Optional[list[str]] = None,
     ) -> list[dict[str, Any]]:
         """
         Get items for a job, optionally filtered by status.
@@ -171,42 +273,105 @@ class TransferQueueService:
             job_id: Job ID
             status: Optional status filter
             limit: Max number of items to return
+            after_id: Only return items with an id greater than this, so
+                pages can continue from the last id of the previous one
+            fields: Columns to return (from ITEM_FIELDS; "id" is always
+                included). Defaults to all columns.
 
         Returns:
-            List of item dicts
+            List of item dicts, ordered by id
+
+        Raises:
+            ValueError: If fields names an unknown column
         """
+        columns = _item_columns(fields)
+
         with get_connection() as conn:
             cursor = conn.cursor()
             if status:
                 cursor.execute(
-                    """SELECT * FROM transfer_items
-                       WHERE job_id = ? AND status = ?
-                       ORDER BY id
-                       LIMIT ?""",
-                    (job_id, status, limit),
+                    _SQL_ITEMS_BY_JOB_STATUS.format(columns=columns),
+                    (job_id, status, after_id, limit),
                 )
             else:
                 cursor.execute(
-                    """SELECT * FROM transfer_items
-                       WHERE job_id = ?
-                       ORDER BY id
-                       LIMIT ?""",
-                    (job_id, limit),
+                    _SQL_ITEMS_BY_JOB.format(columns=columns),
+                    (job_id, after_id, limit),
                 )
             return [dict(row) for row in cursor.fetchall()]
 
-    def get_pending_items(self, job_id: int, limit: int = 10) -> list[dict[str, Any]]:
+    def get_item(self, item_id: int) -> Optional[dict[str, Any]]:
+        """
+        Get a single item by ID.
+
+        Returns:
+            Item dict or None if not found
+        """
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM transfer_items WHERE id = ?", (item_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def get_job_items_by_metadata_status(
+        self,
+        job_id: int,
+        metadata_status: str,
+        limit: int = 1000,
+        fields: Optional[list[str]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get items for a job with the given metadata status.
+
+        Args:
+            job_id: Job ID
+            metadata_status: Metadata status to match
+            limit: Max number of items to return
+            fields: Columns to return, as for get_job_items()
+
+        Returns:
+            List of item dicts, ordered by id
+        """
+        columns = _item_columns(fields)
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT {columns} FROM transfer_items
+                   WHERE job_id = ? AND metadata_status = ?
+                   ORDER BY id
+                   LIMIT ?""",
+                (job_id, metadata_status, limit),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_pending_items(
+        self, job_id: int, after_id: int = 0, limit: int = 10
+    ) -> list[dict[str, Any]]:
         """
         Get pending items for a job (for worker to process).
 
+        Uses a keyset cursor so polling starts right after the last item the
+        caller has seen instead of rescanning items that are already done.
+
         Args:
             job_id: Job ID
+            after_id: Only return items with an id greater than this
             limit: Max number of items to return
 
         Returns:
-            List of pending item dicts
+            List of pending item dicts, ordered by id
         """
-        return self.get_job_items(job_id, status=ITEM_STATUS_PENDING, limit=limit)
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT * FROM transfer_items
+                   WHERE job_id = ? AND status = ? AND id > ?
+                   ORDER BY id
+                   LIMIT ?""",
+                (job_id, ITEM_STATUS_PENDING, after_id, limit),
+            )
+            return [dict(row) for row in cursor.fetchall()]
 
     def update_job_status(
         self,
@@ -225,7 +390,7 @@ class TransferQueueService:
         Returns:
             True if job was updated
         """
-        with get_connection() as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
 
             # Set timestamps based on status
@@ -255,7 +420,7 @@ class TransferQueueService:
             conn.commit()
             updated = cursor.rowcount > 0
             if updated:
-                logger.info(f"Updated job {job_id} status to {status}")
+                logger.info("Updated job %s status to %s", job_id, status)
             return updated
 
     def update_item_status(
@@ -281,46 +446,112 @@ class TransferQueueService:
             metadata_error: Optional metadata error
 
         Returns:
-            True if item was updated
+            True if item was updated, False if it does not exist or already
+            has the requested values
         """
-        with get_connection() as conn:
+        changes: dict[str, Any] = {"status": status}
+        if error_message is not None:
+            changes["error_message"] = error_message
+        if garmin_id is not None:
+            changes["garmin_id"] = garmin_id
+        if local_path is not None:
+            changes["local_path"] = local_path
+        if metadata_status is not None:
+            changes["metadata_status"] = metadata_status
+        if metadata_error is not None:
+            changes["metadata_error"] = metadata_error
+
+        # Only write when at least one column actually changes, so repeated
+        # transitions don't dirty pages or bump updated_at.
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        differs = " OR ".join(f"{column} IS NOT ?" for column in changes)
+        sql = (
+            f"UPDATE transfer_items SET {assignments}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE id = ? AND ({differs})"
+        )
+        values = [*changes.values(), item_id, *changes.values()]
+
+        with write_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(sql, values)
+            conn.commit()
 
-            # Build dynamic update
-            fields = ["status = ?", "updated_at = CURRENT_TIMESTAMP"]
-            values: list[Any] = [status]
-
-            if error_message is not None:
-                fields.append("error_message = ?")
-                values.append(error_message)
+            updated = cursor.rowcount > 0
+            if updated:
+                logger.debug("Updated item %s status to %s", item_id, status)
 
-            if garmin_id is not None:
-                fields.append("garmin_id = ?")
-                values.append(garmin_id)
+            return updated
 
-            if local_path is not None:
-                fields.append("local_path = ?")
-                values.append(local_path)
+    def bulk_update_item_status(self, item_ids: list[int], status: str) -> list[int]:
+        """
+        Move several pending items to the same status in one statement.
 
-            if metadata_status is not None:
-                fields.append("metadata_status = ?")
-                values.append(metadata_status)
+        Items that are no longer pending (e.g. failed by cancel_job) are left
+        alone, so callers should only go on with the IDs returned.
 
-            if metadata_error is not None:
-                fields.append("metadata_error = ?")
-                values.append(metadata_error)
+        Args:
+            item_ids: Item IDs
+            status: New status
 
-            values.append(item_id)
-            sql = f"UPDATE transfer_items SET {', '.join(fields)} WHERE id = ?"
+        Returns:
+            IDs of the items that were still pending and have been updated
+        """
+        if not item_ids:
+            return []
 
-            cursor.execute(sql, values)
+        placeholders = ", ".join("?" * len(item_ids))
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            # The write lock keeps other writers out between the two statements
+            cursor.execute(
+                f"""SELECT id FROM transfer_items
+                    WHERE id IN ({placeholders}) AND status = ?""",
+                (*item_ids, ITEM_STATUS_PENDING),
+            )
+            updated_ids = [row["id"] for row in cursor.fetchall()]
+            if updated_ids:
+                placeholders = ", ".join("?" * len(updated_ids))
+                cursor.execute(
+                    f"""UPDATE transfer_items
+                        SET status = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE id IN ({placeholders})""",
+                    (status, *updated_ids),
+                )
             conn.commit()
 
-            updated = cursor.rowcount > 0
-            if updated:
-                logger.debug(f"Updated item {item_id} status to {status}")
+            logger.debug("Updated %d items to status %s", len(updated_ids), status)
+            return updated_ids
 
-            return updated
+    def bulk_update_metadata_status(
+        self, updates: list[tuple[str, Optional[str], int]]
+    ) -> int:
+        """
+        Record metadata results for several items in one transaction.
+
+        Args:
+            updates: (metadata_status, metadata_error, item_id) tuples; a None
+                error leaves the stored error unchanged
+
+        Returns:
+            Number of items updated
+        """
+        if not updates:
+            return 0
+
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """UPDATE transfer_items
+                   SET metadata_status = ?,
+                       metadata_error = COALESCE(?, metadata_error),
+                       updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                updates,
+            )
+            conn.commit()
+
+            logger.debug("Updated metadata status of %d items", cursor.rowcount)
+            return cursor.rowcount
 
     def increment_item_retry(self, item_id: int) -> int:
         """
@@ -332,7 +563,7 @@ class TransferQueueService:
         Returns:
             New retry count
         """
-        with get_connection() as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """UPDATE transfer_items
@@ -356,44 +587,13 @@ class TransferQueueService:
         Returns:
             Dict with count fields
         """
-        with get_connection() as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
-
-            # Count items by status
-            cursor.execute(
-                """SELECT 
-                       COUNT(*) as total,
-                       SUM(CASE WHEN status IN (?, ?, ?) THEN 1 ELSE 0 END) as completed,
-                       SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as success,
-                       SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as skipped,
-                       SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as failed
-                   FROM transfer_items
-                   WHERE job_id = ?""",
-                (
-                    ITEM_STATUS_SUCCESS,
-                    ITEM_STATUS_SKIPPED,
-                    ITEM_STATUS_FAILED,
-                    ITEM_STATUS_SUCCESS,
-                    ITEM_STATUS_SKIPPED,
-                    ITEM_STATUS_FAILED,
-                    job_id,
-                ),
-            )
-            row = cursor.fetchone()
-            counts = {
-                "total_items": row["total"] or 0,
-                "completed_items": row["completed"] or 0,
-                "success_count": row["success"] or 0,
-                "skipped_count": row["skipped"] or 0,
-                "failed_count": row["failed"] or 0,
-            }
+            counts = _count_items(cursor, job_id)
 
             # Update job
             cursor.execute(
-                """UPDATE transfer_jobs
-                   SET total_items = ?, completed_items = ?, 
-                       success_count = ?, skipped_count = ?, failed_count = ?
-                   WHERE id = ?""",
+                _SQL_UPDATE_JOB_COUNTS,
                 (
                     counts["total_items"],
                     counts["completed_items"],
@@ -407,7 +607,7 @@ class TransferQueueService:
 
             return counts
 
-    def cancel_job(self, job_id: int) -> bool:
+    def cancel_job(self, job_id: int) -> Optional[dict[str, Any]]:
         """
         Cancel a job and all its pending items.
 
@@ -415,20 +615,29 @@ class TransferQueueService:
             job_id: Job ID
 
         Returns:
-            True if job was cancelled
+            The cancelled job with updated counts, or None if the job does
+            not exist or has already finished
         """
-        with get_connection() as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
 
-            # Check if job can be cancelled
-            cursor.execute("SELECT status FROM transfer_jobs WHERE id = ?", (job_id,))
-            row = cursor.fetchone()
-            if not row:
-                return False
-
-            if row["status"] in (JOB_STATUS_COMPLETED, JOB_STATUS_CANCELLED):
-                logger.warning(f"Job {job_id} cannot be cancelled (status: {row['status']})")
-                return False
+            # Update job status; the WHERE clause guards finished jobs
+            now = datetime.now().isoformat()
+            cursor.execute(
+                """UPDATE transfer_jobs
+                   SET status = ?, completed_at = ?
+                   WHERE id = ? AND status NOT IN (?, ?)""",
+                (
+                    JOB_STATUS_CANCELLED,
+                    now,
+                    job_id,
+                    JOB_STATUS_COMPLETED,
+                    JOB_STATUS_CANCELLED,
+                ),
+            )
+            if cursor.rowcount == 0:
+                logger.warning("Job %s not found or cannot be cancelled", job_id)
+                return None
 
             # Cancel pending items
             cursor.execute(
@@ -438,21 +647,27 @@ class TransferQueueService:
                 (ITEM_STATUS_FAILED, job_id, ITEM_STATUS_PENDING),
             )
 
-            # Update job status
-            now = datetime.now().isoformat()
+            # Update counts and read the job back in the same transaction
+            counts = _count_items(cursor, job_id)
             cursor.execute(
-                """UPDATE transfer_jobs
-                   SET status = ?, completed_at = ?
-                   WHERE id = ?""",
-                (JOB_STATUS_CANCELLED, now, job_id),
+                _SQL_UPDATE_JOB_COUNTS,
+                (
+                    counts["total_items"],
+                    counts["completed_items"],
+                    counts["success_count"],
+                    counts["skipped_count"],
+                    counts["failed_count"],
+                    job_id,
+                ),
             )
+            # A plain SELECT rather than UPDATE ... RETURNING, which needs
+            # SQLite 3.35+
+            cursor.execute("SELECT * FROM transfer_jobs WHERE id = ?", (job_id,))
+            job = _job_from_row(cursor.fetchone())
 
             conn.commit()
-            logger.info(f"Cancelled job {job_id}")
-
-            # Update counts
-            self.update_job_counts(job_id)
-            return True
+            logger.info("Cancelled job %s", job_id)
+            return job
 
     def delete_job(self, job_id: int) -> bool:
         """
@@ -464,7 +679,7 @@ class TransferQueueService:
         Returns:
             True if job was deleted
         """
-        with get_connection() as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
 
             # Delete items first (FK cascade should handle this but be explicit)
@@ -476,5 +691,5 @@ class TransferQueueService:
 
             deleted = cursor.rowcount > 0
             if deleted:
-                logger.info(f"Deleted job {job_id}")
+                logger.info("Deleted job %s", job_id)
             return deleted
@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 # Current settings schema version
 SETTINGS_VERSION = 1
 
+# Upper bound for the per-job item concurrency setting
+MAX_CONCURRENCY = 10
+
 # COROS sport type code -> Chinese name mapping
 COROS_SPORT_NAMES: dict[int, str] = {
     100: "跑步",
@@ -168,8 +171,12 @@ class TransferSettingsService:
         # Validate concurrency
         concurrency = settings.get("concurrency")
         if concurrency is not None:
-            if not isinstance(concurrency, int) or concurrency < 1 or concurrency > 10:
-                errors["concurrency"] = "Must be an integer between 1 and 10"
+            if (
+                not isinstance(concurrency, int)
+                or concurrency < 1
+                or concurrency > MAX_CONCURRENCY
+            ):
+                errors["concurrency"] = f"Must be an integer between 1 and {MAX_CONCURRENCY}"
 
         # Validate retry settings
         retry = settings.get("retry", {})
@@ -269,57 +276,89 @@ class TransferSettingsService:
                 "patch": {"activityName": "...", "description": "...", ...}
             }
         """
+        return self.preview_batch([activity], settings)[0]
+
+    def preview_batch(
+        self,
+        activities: list[dict[str, Any]],
+        settings: "dict[str, Any] | None" = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Preview rendered metadata for many activities in one pass.
+
+        Settings are read and templates compiled once, then reused for every
+        activity.
+
+        Args:
+            activities: COROS activity dicts
+            settings: Optional settings override; uses current settings if None
+
+        Returns:
+            List of preview dicts (see preview()), in input order
+        """
         if settings is None:
             settings = self.get_settings()
 
-        context = self._build_template_context(activity)
         naming = settings.get("naming", {})
-
-        # Render title
         title_template = naming.get("title_template", "")
-        title = ""
-        if title_template:
-            try:
-                renderer = TemplateRenderer(title_template)
-                title = renderer.render(context)
-            except Exception as e:
-                logger.warning(f"Failed to render title template: {e}")
-                title = activity.get("name", "")
+        title_renderer = self._compile_template(title_template, "title")
+        desc_renderer = self._compile_template(
+            naming.get("description_template", ""), "description"
+        )
 
-        # Render description
-        desc_template = naming.get("description_template", "")
-        description = ""
-        if desc_template:
-            try:
-                renderer = TemplateRenderer(desc_template)
-                description = renderer.render(context)
-            except Exception as e:
-                logger.warning(f"Failed to render description template: {e}")
-
-        # Build patch (intended metadata operations)
-        patch: dict[str, Any] = {}
-        if title:
-            patch["activityName"] = title
-        if description:
-            patch["description"] = description
-
-        # Privacy
+        # Privacy and gear don't depend on the activity
+        base_patch: dict[str, Any] = {}
         privacy = settings.get("privacy", {})
         visibility = privacy.get("visibility", "default")
         if visibility != "default":
             # Garmin uses different field names
-            patch["privacy"] = {"typeKey": visibility}
+            base_patch["privacy"] = {"typeKey": visibility}
 
-        # Gear
         gear = settings.get("gear", {})
         if gear.get("enabled") and gear.get("gear_id"):
-            patch["gear_id"] = gear["gear_id"]
+            base_patch["gear_id"] = gear["gear_id"]
 
-        return {
-            "rendered": {"title": title, "description": description},
-            "patch": patch,
-            "context": context,  # Include context for debugging
-        }
+        results = []
+        for activity in activities:
+            context = self._build_template_context(activity)
+
+            if title_renderer is not None:
+                title = title_renderer.render(context)
+            elif title_template:
+                # Invalid template: fall back to the activity's own name
+                title = activity.get("name", "")
+            else:
+                title = ""
+
+            description = desc_renderer.render(context) if desc_renderer else ""
+
+            # Build patch (intended metadata operations)
+            patch: dict[str, Any] = {}
+            if title:
+                patch["activityName"] = title
+            if description:
+                patch["description"] = description
+            patch.update(base_patch)
+
+            results.append(
+                {
+                    "rendered": {"title": title, "description": description},
+                    "patch": patch,
+                    "context": context,  # Include context for debugging
+                }
+            )
+
+        return results
+
+    def _compile_template(self, template: str, label: str) -> "TemplateRenderer | None":
+        """Compile a template, returning None if it is empty or invalid."""
+        if not template:
+            return None
+        try:
+            return TemplateRenderer(template)
+        except Exception as e:
+            logger.warning(f"Failed to render {label} template: {e}")
+            return None
 
     def _build_template_context(self, activity: dict[str, Any]) -> dict[str, Any]:
         """Build template context from COROS activity data."""
@@ -1,13 +1,19 @@
 """Transfer worker service - background job processing for COROS->Garmin sync."""
 
 import logging
+import os
+import queue
 import random
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Optional
 
+import garth
+
 from fitness_toolkit.clients.coros import CorosClient
 from fitness_toolkit.clients.garmin import GarminClient
 from fitness_toolkit.config import Config
@@ -34,12 +40,78 @@ from fitness_toolkit.services.transfer_queue import (
 )
 from fitness_toolkit.services.transfer_settings import (
     COROS_SPORT_NAMES,
+    MAX_CONCURRENCY,
     TemplateRenderer,
     TransferSettingsService,
 )
 
 logger = logging.getLogger(__name__)
 
+# Seconds between job progress recounts while items are in flight
+COUNTS_REFRESH_INTERVAL = 2.0
+
+# Safety-net poll interval while idle or paused; normally woken by _wakeup
+IDLE_POLL_INTERVAL = 30.0
+
+# Item columns that _apply_metadata() reads (besides "id")
+METADATA_ITEM_FIELDS = (
+    "garmin_id",
+    "label_id",
+    "sport_type",
+    "activity_name",
+    "activity_time",
+)
+
+# Epoch values above this are milliseconds rather than seconds
+_EPOCH_MS_THRESHOLD = 10_000_000_000
+
+_sport_name = COROS_SPORT_NAMES.get
+
+
+def _parse_coros_time(raw: Any) -> Optional[datetime]:
+    """
+    Parse a COROS startTime value.
+
+    COROS reports start times as epoch seconds or milliseconds (as numbers or
+    digit strings) or as formatted date-time strings.
+
+    Returns:
+        Naive local datetime, or None if the value is missing or unparseable
+    """
+    if raw is None or raw == "":
+        return None
+
+    try:
+        if isinstance(raw, str):
+            raw = raw.strip()
+            if not raw.isdigit():
+                try:
+                    return datetime.fromisoformat(raw.replace("Z", "+00:00"))
+                except ValueError:
+                    return datetime.strptime(raw, "%Y-%m-%d %H:%M:%S")
+        ts = float(raw)
+        if ts > _EPOCH_MS_THRESHOLD:
+            ts /= 1000.0
+        return datetime.fromtimestamp(ts)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+# Bytes 8-11 of every FIT file header
+_FIT_SIGNATURE = b".FIT"
+
+
+def _is_valid_fit(path: Path) -> bool:
+    """Check that a file exists and starts with a FIT file header."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(12)
+    except OSError:
+        return False
+    return (
+        len(header) == 12 and header[0] in (12, 14) and header[8:12] == _FIT_SIGNATURE
+    )
+
 
 class TransferWorker:
     """Background worker for processing transfer jobs."""
@@ -55,11 +127,30 @@ class TransferWorker:
         self.settings_service = settings_service or TransferSettingsService()
 
         self._thread: Optional[threading.Thread] = None
+        # Item pool shared by all jobs; lives as long as the worker loop
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Runs metadata calls alongside the item thread that uploaded the file;
+        # lives as long as the item pool (without it they run inline)
+        self._metadata_executor: Optional[ThreadPoolExecutor] = None
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
+        # Set to wake the idle/paused worker loop (new job, resume, stop)
+        self._wakeup = threading.Event()
+        # Set by pause() and stop() to cut item retry backoff short
+        self._halt = threading.Event()
         self._current_job_id: Optional[int] = None
         self._lock = threading.Lock()
 
+        # platform -> (email, decrypted password), refreshed for every job
+        self._credentials: dict[str, tuple[str, str]] = {}
+
+        # label_id -> event set when that activity's in-progress download ends
+        self._downloads: dict[str, threading.Event] = {}
+        self._downloads_lock = threading.Lock()
+
+        # sport_type -> download directory, rebuilt for every job
+        self._sport_dirs: dict[int, Path] = {}
+
         # Callbacks for status updates
         self._on_item_complete: Optional[Callable[[int, dict], None]] = None
         self._on_job_complete: Optional[Callable[[int, dict], None]] = None
@@ -87,6 +178,8 @@ class TransferWorker:
 
         self._stop_event.clear()
         self._pause_event.clear()
+        self._wakeup.clear()
+        self._halt.clear()
         self._thread = threading.Thread(target=self._worker_loop, daemon=True)
         self._thread.start()
         logger.info("Transfer worker started")
@@ -99,6 +192,8 @@ class TransferWorker:
 
         self._stop_event.set()
         self._pause_event.clear()  # Unpause so thread can exit
+        self._halt.set()
+        self._wakeup.set()
 
         if wait and self._thread:
             self._thread.join(timeout=timeout)
@@ -115,6 +210,7 @@ class TransferWorker:
             return False
 
         self._pause_event.set()
+        self._halt.set()
         logger.info("Transfer worker paused")
 
         # Update current job status if any
@@ -132,17 +228,21 @@ class TransferWorker:
             self.queue_service.update_job_status(self._current_job_id, JOB_STATUS_RUNNING)
 
         self._pause_event.clear()
+        self._halt.clear()
+        self._wakeup.set()
         logger.info("Transfer worker resumed")
         return True
 
-    def process_job(self, job_id: int) -> bool:
+    def process_job(self, job_id: int, job: Optional[dict[str, Any]] = None) -> bool:
         """
         Queue a job for processing.
 
         If worker is running, the job will be picked up automatically.
-        If not running, starts the worker.
+        If not running, starts the worker. Callers that have just read the
+        job can pass it as job to skip reading it again.
         """
-        job = self.queue_service.get_job(job_id)
+        if job is None:
+            job = self.queue_service.get_job(job_id)
         if not job:
             logger.error(f"Job {job_id} not found")
             return False
@@ -151,10 +251,13 @@ class TransferWorker:
             logger.warning(f"Job {job_id} is not in pending/paused state: {job['status']}")
             return False
 
-        # Mark as pending to be picked up
-        self.queue_service.update_job_status(job_id, JOB_STATUS_PENDING)
+        # Mark a paused job as pending to be picked up
+        if job["status"] != JOB_STATUS_PENDING:
+            self.queue_service.update_job_status(job_id, JOB_STATUS_PENDING)
 
-        if not self.is_running:
+        if self.is_running:
+            self._wakeup.set()
+        else:
             self.start()
 
         return True
@@ -163,66 +266,105 @@ class TransferWorker:
         """Main worker loop - processes jobs sequentially."""
         logger.info("Worker loop started")
 
-        while not self._stop_event.is_set():
-            # Check for pause
-            while self._pause_event.is_set() and not self._stop_event.is_set():
-                time.sleep(0.5)
-
-            if self._stop_event.is_set():
-                break
-
-            # Find next pending job
-            job = self._get_next_job()
-            if not job:
-                # No work to do, sleep before checking again
-                time.sleep(1.0)
-                continue
-
-            # Process the job
-            self._process_single_job(job)
+        # Sized for the largest allowed concurrency; each job caps its own
+        # in-flight items by fetching at most `concurrency` at a time.
+        self._executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENCY, thread_name_prefix="transfer-item"
+        )
+        self._metadata_executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENCY, thread_name_prefix="transfer-metadata"
+        )
+        try:
+            while not self._stop_event.is_set():
+                # Check for pause
+                while self._pause_event.is_set() and not self._stop_event.is_set():
+                    self._wakeup.wait(IDLE_POLL_INTERVAL)
+                    self._wakeup.clear()
+
+                if self._stop_event.is_set():
+                    break
+
+                # Find next pending job
+                job = self._get_next_job()
+                if not job:
+                    # No work to do; wait for process_job()/stop() to wake us.
+                    # Clearing before the next query means a wakeup that lands
+                    # in between is still picked up by that query.
+                    self._wakeup.wait(IDLE_POLL_INTERVAL)
+                    self._wakeup.clear()
+                    continue
+
+                # Process the job
+                self._process_single_job(job)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            # Items are done, so no metadata call is still waited on
+            self._metadata_executor.shutdown(wait=False)
+            self._metadata_executor = None
 
         logger.info("Worker loop ended")
 
     def _get_next_job(self) -> Optional[dict[str, Any]]:
         """Get the next pending job to process."""
-        jobs = self.queue_service.list_jobs(limit=10)
-        for job in jobs:
-            if job["status"] == JOB_STATUS_PENDING:
-                return self.queue_service.get_job(job["id"])
-        return None
+        return self.queue_service.get_next_pending_job()
 
     def _create_garmin_client(self) -> Optional[GarminClient]:
         """Create a new authenticated Garmin client (thread-safe)."""
-        account = get_account("garmin")
-        if not account:
-            return None
-        
-        email = account["email"]
-        password = decrypt_password(account["password_encrypted"])
-        if not password:
-            return None
-        
-        client = GarminClient()
-        if client.login(email, password):
-            return client
-        return None
+        return self._login("garmin", GarminClient)
 
     def _create_coros_client(self) -> Optional[CorosClient]:
         """Create a new authenticated COROS client."""
-        account = get_account("coros")
-        if not account:
+        return self._login("coros", CorosClient)
+
+    def _login(self, platform: str, client_class: Callable[[], Any]) -> Any:
+        """
+        Create a client for a platform and log it in with cached credentials.
+
+        If the login fails, the cached credentials are re-read once in case the
+        account was reconfigured since they were cached.
+
+        Returns:
+            Authenticated client, or None if not configured or login failed
+        """
+        credentials = self._get_credentials(platform)
+        if not credentials:
             return None
-        
-        email = account["email"]
-        password = decrypt_password(account["password_encrypted"])
-        if not password:
+
+        client = client_class()
+        if client.login(*credentials):
+            return client
+
+        with self._lock:
+            self._credentials.pop(platform, None)
+        fresh = self._get_credentials(platform)
+        if not fresh or fresh == credentials:
             return None
-        
-        client = CorosClient()
-        if client.login(email, password):
+
+        client = client_class()
+        if client.login(*fresh):
             return client
         return None
 
+    def _get_credentials(self, platform: str) -> Optional[tuple[str, str]]:
+        """Return (email, password) for a platform, decrypting it once per job."""
+        with self._lock:
+            credentials = self._credentials.get(platform)
+            if credentials:
+                return credentials
+
+            account = get_account(platform)
+            if not account:
+                return None
+
+            password = decrypt_password(account["password_encrypted"])
+            if not password:
+                return None
+
+            credentials = (account["email"], password)
+            self._credentials[platform] = credentials
+            return credentials
+
     def _process_single_job(self, job: dict[str, Any]) -> None:
         """Process a single job with concurrent item processing."""
         job_id = job["id"]
@@ -238,6 +380,12 @@ class TransferWorker:
         max_attempts = retry_config.get("max_attempts", 3)
         base_delay = retry_config.get("base_delay_seconds", 1)
         max_delay = retry_config.get("max_delay_seconds", 60)
+        renderers = self._compile_renderers(settings)
+
+        # Pick up account changes made since the last job
+        with self._lock:
+            self._credentials.clear()
+            self._sport_dirs.clear()
 
         # Create initial clients to verify credentials
         coros_client = self._create_coros_client()
@@ -250,61 +398,119 @@ class TransferWorker:
             self._current_job_id = None
             return
 
-        # Process items with ThreadPoolExecutor
+        # Authenticated client pairs are shared by the item threads; the pair
+        # used to verify credentials seeds the pool.
+        clients: queue.SimpleQueue[tuple[CorosClient, GarminClient]]
+        clients = queue.SimpleQueue()
+        clients.put((coros_client, garmin_client))
+
+        # Process items on the worker's shared pool, keeping up to
+        # `concurrency` items in flight and refilling as each one finishes.
+        # A single-stream job runs its items inline on this thread instead.
+        serial = concurrency <= 1
+        backlog: deque[dict[str, Any]] = deque()
+        in_flight: dict[Future, int] = {}
+        last_item_id = 0
+        exhausted = False
+        counts_refreshed_at = time.monotonic()
         try:
-            with ThreadPoolExecutor(max_workers=concurrency) as executor:
-                while not self._stop_event.is_set():
-                    # Check for pause
-                    if self._pause_event.is_set():
-                        logger.info(f"Job {job_id} paused")
-                        break
-
-                    # Get batch of pending items
-                    items = self.queue_service.get_pending_items(job_id, limit=concurrency)
-                    if not items:
-                        # No more items
-                        break
-
-                    # Submit items for processing
-                    futures = {}
-                    for item in items:
-                        # Mark as in-progress before submitting
-                        self.queue_service.update_item_status(item["id"], ITEM_STATUS_DOWNLOADING)
-                        
+            executor = self._executor
+            if executor is None and not serial:
+                raise RuntimeError("Worker executor is not running")
+
+            while True:
+                halted = self._stop_event.is_set() or self._pause_event.is_set()
+
+                if not halted:
+                    # Prefetch several windows' worth of items at a time
+                    if not exhausted and len(backlog) < concurrency:
+                        fetch_limit = concurrency * 4
+                        items = self.queue_service.get_pending_items(
+                            job_id, after_id=last_item_id, limit=fetch_limit
+                        )
+                        if items:
+                            last_item_id = items[-1]["id"]
+                            backlog.extend(items)
+                        exhausted = len(items) < fetch_limit
+
+                    batch = [
+                        backlog.popleft()
+                        for _ in range(min(len(backlog), concurrency - len(in_flight)))
+                    ]
+                    # Mark as in-progress before submitting; only items still
+                    # pending are claimed (a cancel may have failed the rest)
+                    claimed = set(
+                        self.queue_service.bulk_update_item_status(
+                            [item["id"] for item in batch], ITEM_STATUS_DOWNLOADING
+                        )
+                    )
+                    if len(claimed) < len(batch):
+                        # Items changed under us (e.g. the job was cancelled);
+                        # drop the prefetched rest and re-read from the database
+                        backlog.clear()
+                        last_item_id = batch[-1]["id"]
+                        exhausted = False
+                    for item in batch:
+                        if item["id"] not in claimed:
+                            continue
+                        if serial:
+                            # Fail only this item, as the pool path does
+                            try:
+                                self._process_item_concurrent(
+                                    item,
+                                    clients,
+                                    settings,
+                                    renderers,
+                                    max_attempts,
+                                    base_delay,
+                                    max_delay,
+                                )
+                            except Exception as e:
+                                logger.exception(
+                                    f"Item {item['id']} failed with exception: {e}"
+                                )
+                            continue
                         future = executor.submit(
                             self._process_item_concurrent,
                             item,
+                            clients,
                             settings,
+                            renderers,
                             max_attempts,
                             base_delay,
                             max_delay,
                         )
-                        futures[future] = item["id"]
+                        in_flight[future] = item["id"]
 
-                    # Wait for batch to complete
-                    for future in as_completed(futures):
-                        item_id = futures[future]
+                # Nothing running or queued means the job is drained or halted
+                if not in_flight:
+                    if halted or (exhausted and not backlog):
+                        break
+                else:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item_id = in_flight.pop(future)
                         try:
                             future.result()
                         except Exception as e:
                             logger.exception(f"Item {item_id} failed with exception: {e}")
 
-                        # Check for stop/pause after each item
-                        if self._stop_event.is_set() or self._pause_event.is_set():
-                            break
-
-                    # Update job counts after batch
+                # Refresh progress periodically rather than per item
+                now = time.monotonic()
+                if now - counts_refreshed_at >= COUNTS_REFRESH_INTERVAL:
                     self.queue_service.update_job_counts(job_id)
+                    counts_refreshed_at = now
+
+            counts = self.queue_service.update_job_counts(job_id)
 
             # Check final status
             if self._stop_event.is_set():
                 logger.info(f"Job {job_id} stopped by worker shutdown")
             elif self._pause_event.is_set():
-                # Already set to paused above
-                pass
+                # Status was already set to paused by pause()
+                logger.info(f"Job {job_id} paused")
             else:
                 # Job completed
-                counts = self.queue_service.update_job_counts(job_id)
                 if counts["failed_count"] > 0 and counts["success_count"] == 0:
                     self.queue_service.update_job_status(job_id, JOB_STATUS_FAILED)
                 else:
@@ -329,33 +535,47 @@ class TransferWorker:
     def _process_item_concurrent(
         self,
         item: dict[str, Any],
+        clients: "queue.SimpleQueue[tuple[CorosClient, GarminClient]]",
         settings: dict[str, Any],
+        renderers: dict[str, Optional[TemplateRenderer]],
         max_attempts: int,
         base_delay: float,
         max_delay: float,
     ) -> None:
-        """Process a single item in a worker thread (creates own clients)."""
-        # Create thread-local clients
-        coros_client = self._create_coros_client()
-        garmin_client = self._create_garmin_client()
+        """
+        Process a single item in a worker thread.
 
-        if not coros_client or not garmin_client:
-            self.queue_service.update_item_status(
-                item["id"],
-                ITEM_STATUS_FAILED,
-                error_message="Failed to create clients",
-            )
-            return
+        Borrows an authenticated client pair from the job's pool, logging in a
+        new pair only when every existing one is in use. The pair is returned
+        afterwards unless the item failed, so a stale session gets replaced by
+        a fresh login on the next item.
+        """
+        try:
+            coros_client, garmin_client = clients.get_nowait()
+        except queue.Empty:
+            coros_client = self._create_coros_client()
+            garmin_client = self._create_garmin_client()
+
+            if not coros_client or not garmin_client:
+                self.queue_service.update_item_status(
+                    item["id"],
+                    ITEM_STATUS_FAILED,
+                    error_message="Failed to create clients",
+                )
+                return
 
-        self._process_single_item(
+        succeeded = self._process_single_item(
             item,
             coros_client,
             garmin_client,
             settings,
+            renderers,
             max_attempts,
             base_delay,
             max_delay,
         )
+        if succeeded:
+            clients.put((coros_client, garmin_client))
 
     def _process_single_item(
         self,
@@ -363,11 +583,17 @@ class TransferWorker:
         coros_client: CorosClient,
         garmin_client: GarminClient,
         settings: dict[str, Any],
+        renderers: dict[str, Optional[TemplateRenderer]],
         max_attempts: int,
         base_delay: float,
         max_delay: float,
-    ) -> None:
-        """Process a single transfer item with retry logic."""
+    ) -> bool:
+        """
+        Process a single transfer item with retry logic.
+
+        Returns:
+            True if the item was transferred or skipped as a duplicate
+        """
         item_id = item["id"]
         label_id = item["label_id"]
         sport_type = item["sport_type"]
@@ -379,34 +605,31 @@ class TransferWorker:
         attempt = item.get("retry_count", 0)
         last_error = None
 
+        first_attempt = attempt
+        fit_path = self._fit_path(label_id, sport_type)
+
         while attempt < max_attempts:
             if self._stop_event.is_set() or self._pause_event.is_set():
-                return
+                return False
 
             try:
-                # Step 1: Download from COROS
-                self.queue_service.update_item_status(item_id, ITEM_STATUS_DOWNLOADING)
+                # Step 1: Download from COROS (the caller marks the first
+                # attempt as downloading before submitting the item)
+                if attempt > first_attempt:
+                    self.queue_service.update_item_status(item_id, ITEM_STATUS_DOWNLOADING)
 
-                save_dir = Path(Config.DOWNLOADS_DIR) / "coros" / str(sport_type)
-                fit_path = save_dir / f"{label_id}.fit"
-
-                if not fit_path.exists():
-                    downloaded = coros_client.download_activity(
-                        label_id, sport_type, "fit", fit_path
-                    )
-                    if not downloaded:
-                        raise Exception("Download failed - no file returned")
+                self._ensure_fit_file(coros_client, label_id, sport_type, fit_path)
 
+                # Step 2: Upload to Garmin
                 self.queue_service.update_item_status(
-                    item_id, ITEM_STATUS_DOWNLOADING, local_path=str(fit_path)
+                    item_id, ITEM_STATUS_UPLOADING, local_path=str(fit_path)
                 )
 
-                # Step 2: Upload to Garmin
-                self.queue_service.update_item_status(item_id, ITEM_STATUS_UPLOADING)
-
+                # upload_fit() renames the activity itself when given a name;
+                # skip that PUT when the title template will rename it anyway
                 garmin_id = garmin_client.upload_fit(
                     fit_path,
-                    activity_name,
+                    None if renderers.get("title") else activity_name,
                     start_time=item.get("activity_time"),
                 )
 
@@ -420,14 +643,14 @@ class TransferWorker:
                         metadata_status=METADATA_STATUS_SKIPPED,
                     )
                     logger.info(f"Item {item_id} skipped (duplicate)")
-                    return
+                    return True
 
                 if not garmin_id:
                     raise Exception("Upload failed - no Garmin ID returned")
 
                 # Step 3: Apply metadata (warning-only)
                 metadata_status, metadata_error = self._apply_metadata(
-                    garmin_client, garmin_id, item, settings
+                    garmin_client, garmin_id, item, settings, renderers
                 )
 
                 self.queue_service.update_item_status(
@@ -441,13 +664,20 @@ class TransferWorker:
                 logger.info(f"Item {item_id} completed: Garmin ID {garmin_id}")
 
                 if self._on_item_complete:
-                    updated_item = self.queue_service.get_job_items(
-                        item["job_id"], limit=1
+                    self._on_item_complete(
+                        item_id,
+                        {
+                            **item,
+                            "status": ITEM_STATUS_SUCCESS,
+                            "retry_count": attempt,
+                            "garmin_id": garmin_id,
+                            "local_path": str(fit_path),
+                            "metadata_status": metadata_status,
+                            "metadata_error": metadata_error,
+                        },
                     )
-                    if updated_item:
-                        self._on_item_complete(item_id, updated_item[0])
 
-                return
+                return True
 
             except Exception as e:
                 last_error = str(e)
@@ -455,14 +685,16 @@ class TransferWorker:
                 self.queue_service.increment_item_retry(item_id)
 
                 if attempt < max_attempts:
-                    # Exponential backoff with jitter
-                    delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
-                    delay = delay * (0.5 + random.random())  # Add jitter
+                    # Exponential backoff with full jitter so item threads
+                    # don't retry against the same server in lockstep
+                    ceiling = min(base_delay * (1 << (attempt - 1)), max_delay)
+                    delay = random.random() * ceiling
                     logger.warning(
                         f"Item {item_id} failed (attempt {attempt}/{max_attempts}): {e}. "
                         f"Retrying in {delay:.1f}s"
                     )
-                    time.sleep(delay)
+                    # Wake early if the worker is paused or stopped
+                    self._halt.wait(delay)
                 else:
                     logger.error(f"Item {item_id} failed after {max_attempts} attempts: {e}")
 
@@ -472,6 +704,77 @@ class TransferWorker:
             ITEM_STATUS_FAILED,
             error_message=last_error,
         )
+        return False
+
+    def _fit_path(self, label_id: str, sport_type: int) -> Path:
+        """Get the local FIT path for an activity, caching the sport directory."""
+        save_dir = self._sport_dirs.get(sport_type)
+        if save_dir is None:
+            save_dir = self._sport_dirs.setdefault(
+                sport_type, Path(Config.DOWNLOADS_DIR) / "coros" / str(sport_type)
+            )
+        return save_dir / f"{label_id}.fit"
+
+    def _ensure_fit_file(
+        self,
+        coros_client: CorosClient,
+        label_id: str,
+        sport_type: int,
+        fit_path: Path,
+    ) -> None:
+        """
+        Make sure a valid FIT file for an activity exists at fit_path.
+
+        The file is downloaded to a ``.part`` sibling and moved into place only
+        once its header checks out, so an interrupted download is never
+        mistaken for a finished one. Concurrent requests for the same activity
+        wait for the first download instead of fetching it again.
+
+        Raises:
+            Exception: If the activity could not be downloaded
+        """
+        if _is_valid_fit(fit_path):
+            return
+
+        with self._downloads_lock:
+            in_progress = self._downloads.get(label_id)
+            if in_progress is None:
+                self._downloads[label_id] = threading.Event()
+
+        if in_progress is not None:
+            in_progress.wait()
+            if _is_valid_fit(fit_path):
+                return
+            raise Exception("Download failed in a concurrent attempt")
+
+        part_path = fit_path.with_name(fit_path.name + ".part")
+        try:
+            downloaded = coros_client.download_activity(
+                label_id, sport_type, "fit", part_path
+            )
+            if not downloaded:
+                raise Exception("Download failed - no file returned")
+            if not _is_valid_fit(part_path):
+                part_path.unlink(missing_ok=True)
+                raise Exception("Download failed - not a valid FIT file")
+            os.replace(part_path, fit_path)
+        finally:
+            with self._downloads_lock:
+                self._downloads.pop(label_id).set()
+
+    def _compile_renderers(
+        self, settings: dict[str, Any]
+    ) -> dict[str, Optional[TemplateRenderer]]:
+        """Compile the job's naming templates once for all of its items."""
+        title_template = settings.get("naming", {}).get("title_template", "")
+        title_renderer = None
+        if title_template:
+            try:
+                title_renderer = TemplateRenderer(title_template)
+            except Exception as e:
+                # Templates are validated on save, so this only hits old snapshots
+                logger.warning(f"Ignoring invalid title template: {e}")
+        return {"title": title_renderer}
 
     def _apply_metadata(
         self,
@@ -479,37 +782,69 @@ class TransferWorker:
         garmin_id: str,
         item: dict[str, Any],
         settings: dict[str, Any],
+        renderers: Optional[dict[str, Optional[TemplateRenderer]]] = None,
     ) -> tuple[str, Optional[str]]:
         """
         Apply metadata to uploaded activity (title, description, privacy, gear).
 
+        Args:
+            garmin_client: Authenticated Garmin client
+            garmin_id: Uploaded Garmin activity ID
+            item: Transfer item dict
+            settings: Job settings snapshot
+            renderers: Templates compiled by _compile_renderers(); compiled
+                from settings when not given
+
         Returns:
             Tuple of (metadata_status, metadata_error)
         """
-        naming = settings.get("naming", {})
+        if renderers is None:
+            renderers = self._compile_renderers(settings)
+
         privacy = settings.get("privacy", {})
         gear = settings.get("gear", {})
 
+        # Gear linking uses its own endpoint, so while the worker loop runs it
+        # goes alongside the name and privacy updates (which both PUT the
+        # activity and stay sequential); otherwise it runs last, inline
+        link_gear = bool(gear.get("enabled") and gear.get("gear_id"))
+        gear_future: Optional[Future] = None
+        metadata_executor = self._metadata_executor
+        if link_gear and metadata_executor is not None:
+            gear_future = metadata_executor.submit(
+                self._link_gear, garmin_client, garmin_id, gear["gear_id"]
+            )
+
         # Build template context
         context = self._build_metadata_context(item)
 
         errors = []
 
         # Apply title
-        title_template = naming.get("title_template", "")
-        if title_template:
+        title_renderer = renderers.get("title")
+        if title_renderer:
+            title = ""
+            renamed = False
             try:
-                renderer = TemplateRenderer(title_template)
-                title = renderer.render(context)
+                title = title_renderer.render(context)
                 if title:
-                    success = garmin_client._set_activity_name(garmin_id, title)
-                    if not success:
+                    renamed = garmin_client._set_activity_name(garmin_id, title)
+                    if not renamed:
                         errors.append("Failed to set activity name")
             except Exception as e:
                 errors.append(f"Title error: {e}")
 
+            # upload_fit() leaves the COROS name off when a title template is
+            # set; apply it instead if the template gave no usable title
+            activity_name = item.get("activity_name")
+            if not renamed and activity_name and activity_name != title:
+                try:
+                    garmin_client._set_activity_name(garmin_id, activity_name)
+                except Exception as e:
+                    logger.warning(f"Failed to set fallback name for {garmin_id}: {e}")
+
         # Apply description (if supported - may need API extension)
-        # desc_template = naming.get("description_template", "")
+        # desc_template = settings["naming"].get("description_template", "")
         # TODO: Implement description update API if Garmin supports it
 
         # Apply privacy (if not default)
@@ -523,9 +858,12 @@ class TransferWorker:
                 errors.append(f"Privacy error: {e}")
 
         # Apply gear (if enabled)
-        if gear.get("enabled") and gear.get("gear_id"):
+        if link_gear:
             try:
-                success = self._link_gear(garmin_client, garmin_id, gear["gear_id"])
+                if gear_future is not None:
+                    success = gear_future.result()
+                else:
+                    success = self._link_gear(garmin_client, garmin_id, gear["gear_id"])
                 if not success:
                     errors.append("Failed to link gear")
             except Exception as e:
@@ -537,45 +875,13 @@ class TransferWorker:
 
     def _build_metadata_context(self, item: dict[str, Any]) -> dict[str, Any]:
         """Build template context from item data."""
-        from datetime import datetime
-
         sport_type = item.get("sport_type", 9999)
-        sport = COROS_SPORT_NAMES.get(sport_type, "运动")
-
-        raw_start_time = item.get("activity_time")
-        start_time = None
-        start_local = None
-        if raw_start_time is not None and raw_start_time != "":
-            # COROS startTime can be epoch seconds (or ms) or a formatted string.
-            try:
-                if isinstance(raw_start_time, (int, float)):
-                    ts = float(raw_start_time)
-                elif isinstance(raw_start_time, str) and raw_start_time.strip().isdigit():
-                    ts = float(raw_start_time.strip())
-                else:
-                    ts = None
-
-                if ts is not None:
-                    if ts > 10_000_000_000:
-                        ts = ts / 1000.0
-                    start_time = datetime.fromtimestamp(ts)
-                    start_local = start_time
-                else:
-                    start_time_str = str(raw_start_time)
-                    try:
-                        start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
-                        start_local = start_time
-                    except ValueError:
-                        start_time = datetime.fromisoformat(
-                            start_time_str.replace("Z", "+00:00")
-                        )
-                        start_local = start_time
-            except Exception:
-                pass
+        start_time = _parse_coros_time(item.get("activity_time"))
+        start_local = start_time
 
         return {
             "label_id": item.get("label_id", ""),
-            "sport": sport,
+            "sport": _sport_name(sport_type, "运动"),
             "sport_type": sport_type,
             "start_time": start_time,
             "start_local": start_local,
@@ -592,8 +898,6 @@ class TransferWorker:
     ) -> bool:
         """Set activity privacy level."""
         try:
-            import garth
-
             # Map visibility to Garmin privacy type
             privacy_map = {
                 "private": "private",
@@ -616,8 +920,6 @@ class TransferWorker:
     ) -> bool:
         """Link gear to activity."""
         try:
-            import garth
-
             path = f"/gear-service/gear/link/{gear_id}/activity/{activity_id}"
             garth.client.connectapi(path, method="PUT")
             return True
@@ -634,6 +936,9 @@ _worker_lock = threading.Lock()
 def get_worker() -> TransferWorker:
     """Get the global worker instance."""
     global _worker_instance
+    worker = _worker_instance
+    if worker is not None:
+        return worker
     with _worker_lock:
         if _worker_instance is None:
             _worker_instance = TransferWorker()
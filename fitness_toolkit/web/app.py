@@ -1,10 +1,13 @@
 import logging
 import os
+from datetime import date
 
-from flask import Flask, jsonify, request, render_template
+import garth
+from flask import Flask, Response, current_app, jsonify, request, render_template, stream_with_context
+from werkzeug.http import generate_etag
 
 from fitness_toolkit.config import Config
-from fitness_toolkit.database import init_db, save_operation_history, get_operation_history, delete_operation_history
+from fitness_toolkit.database import init_db, get_operation_history, delete_operation_history
 from fitness_toolkit.services.account import AccountService
 from fitness_toolkit.services.download import DownloadService
 try:
@@ -13,570 +16,861 @@ except Exception:  # pragma: no cover
     SchedulerService = None
 from fitness_toolkit.services.transfer import TransferService
 from fitness_toolkit.services.transfer_settings import TransferSettingsService
-from fitness_toolkit.services.transfer_queue import TransferQueueService
-from fitness_toolkit.services.transfer_worker import get_worker, reset_worker
+from fitness_toolkit.services.transfer_queue import METADATA_STATUS_FAILED, TransferQueueService
+from fitness_toolkit.services.transfer_worker import (
+    METADATA_ITEM_FIELDS,
+    TransferWorker,
+    get_worker,
+    reset_worker,
+)
+from fitness_toolkit.web.cache import TTLCache
+from fitness_toolkit.web.history import HistoryWriter
+from fitness_toolkit.web.json_provider import OrjsonProvider
+
+try:
+    import waitress
+except ModuleNotFoundError:  # pragma: no cover
+    waitress = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+# Seconds that cached account and task lists are served before re-reading
+LIST_CACHE_TIMEOUT = 30
+# Seconds that the Garmin gear list is served before asking Garmin again
+GEAR_CACHE_TIMEOUT = 300
+# Seconds that cached history pages are served; history views clear them on writes
+HISTORY_CACHE_TIMEOUT = 10
+
+# Accept type that makes /api/transfer stream one JSON line per activity
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Worker threads for waitress, when it is installed
+SERVER_THREADS = 8
+
+# Database files that create_app has already run init_db() against
+_initialized_db_paths = set()
+
+
+# JSON type names used in validation errors
+_TYPE_NAMES = {str: 'string', list: 'list', dict: 'object', int: 'integer'}
+
+# Expected value types for the fields of each request body
+_ACCOUNT_FIELDS = {'platform': str, 'email': str, 'password': str}
+_DOWNLOAD_FIELDS = {'account_id': str, 'format': str}
+_TASK_FIELDS = {'account_id': str, 'name': str, 'cron_expression': str, 'format': str}
+
+
+def _parse_json(required: tuple = (), types: "dict | None" = None):
+    """Parse the JSON request body and check required keys and value types.
 
-def create_app(testing: "bool | None" = None):
-    """Create and configure Flask application.
-    
     Args:
-        testing: If True, skip starting background scheduler. If None, auto-detect
-                 from TESTING environment variable.
+        required: Keys the body must contain.
+        types: Mapping of key to expected type; a value of None is accepted
+               only for keys that are not required.
+
+    Returns:
+        Tuple of (data, error_response); error_response is None when the body is valid.
     """
-    app = Flask(__name__, 
-                template_folder='templates',
-                static_folder='static')
-    
-    # Determine testing mode
-    if testing is None:
-        testing = os.environ.get("TESTING", "").lower() in ("1", "true", "yes")
-    app.config["TESTING"] = testing
-    
-    # Initialize database
-    init_db()
-    
-    # Initialize services
-    account_service = AccountService()
-    download_service = DownloadService()
-    if SchedulerService is None:
-        scheduler_service = None
-    else:
-        try:
-            scheduler_service = SchedulerService()
-        except Exception:
-            scheduler_service = None
-    transfer_settings_service = TransferSettingsService()
-    transfer_queue_service = TransferQueueService()
-    
-    # Start scheduler only if not testing
-    if not testing and scheduler_service is not None:
-        scheduler_service.start()
-    
-    @app.route('/')
-    def index():
-        """Home page."""
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return None, (jsonify({'error': 'Request body is required'}), 400)
+
+    if not frozenset(required).issubset(data):
+        if len(required) == 1:
+            message = f'{required[0]} is required'
+        else:
+            message = f"{', '.join(required[:-1])} and {required[-1]} are required"
+        return None, (jsonify({'error': message}), 400)
+
+    for key, expected in (types or {}).items():
+        value = data.get(key)
+        if value is None and key not in required:
+            continue
+        if not isinstance(value, expected):
+            message = f'{key} must be a {_TYPE_NAMES[expected]}'
+            return None, (jsonify({'error': message}), 400)
+
+    return data, None
+
+
+def _transfer_service():
+    """Get the app's TransferService, creating it on first use.
+
+    It shares the app's AccountService, so logged-in clients are reused
+    across requests instead of logging in again for every transfer.
+    """
+    services = current_app.extensions['fitness_toolkit']
+    transfer_service = services.get('transfer')
+    if transfer_service is None:
+        transfer_service = services.setdefault(
+            'transfer', TransferService(account_service=services['account'])
+        )
+    return transfer_service
+
+
+def _parse_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date string.
+
+    Splitting the fixed format is much cheaper than datetime.strptime.
+
+    Raises:
+        TypeError: If value is not a string
+        ValueError: If value is not a valid YYYY-MM-DD date
+    """
+    if not isinstance(value, str):
+        raise TypeError(f'Expected a date string, got {type(value).__name__}')
+    year, month, day = value.split('-')
+    return date(int(year), int(month), int(day))
+
+
+def _parse_date_range(data):
+    """Validate the start_date, end_date and sport_types of a transfer body.
+
+    Returns:
+        (start_date, end_date, sport_types, None) on success, or
+        (None, None, None, error_response) when a field is invalid
+    """
+    try:
+        start_date = _parse_date(data['start_date'])
+        end_date = _parse_date(data['end_date'])
+    except (ValueError, TypeError):
+        return None, None, None, (jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400)
+
+    if start_date > end_date:
+        return None, None, None, (jsonify({'error': 'start_date must be before or equal to end_date'}), 400)
+
+    sport_types = data.get('sport_types')
+    if sport_types is not None and not isinstance(sport_types, list):
+        return None, None, None, (jsonify({'error': 'sport_types must be a list'}), 400)
+
+    return start_date, end_date, sport_types, None
+
+
+def _conditional_json(payload):
+    """JSON response with an ETag; answers 304 when the client's copy matches.
+
+    For endpoints the UI polls, so unchanged state is not sent again.
+    """
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def _service(name: str):
+    """Get a service registered on the current app by create_app().
+
+    Args:
+        name: Service key, e.g. 'account' or 'transfer_queue'.
+
+    Returns:
+        The service instance (None for an unavailable scheduler).
+    """
+    return current_app.extensions['fitness_toolkit'][name]
+
+
+def index():
+    """Home page.
+
+    The page has no per-request content, so outside debug mode it is rendered
+    once per app and served with an ETag so browsers can revalidate it cheaply.
+    """
+    if current_app.debug:
         return render_template('index.html')
-    
-    # API Routes
-    @app.route('/api/accounts', methods=['GET'])
-    def list_accounts():
-        """List all accounts."""
+
+    services = current_app.extensions['fitness_toolkit']
+    page = services.get('index_page')
+    if page is None:
+        body = render_template('index.html').encode()
+        page = services.setdefault('index_page', (body, generate_etag(body)))
+
+    body, etag = page
+    response = current_app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+# API Routes
+def list_accounts():
+    """List all accounts."""
+    account_service = _service('account')
+    cache = _service('cache')
+    accounts = cache.get('accounts')
+    if accounts is None:
         accounts = account_service.list_accounts()
-        return jsonify({'accounts': accounts})
-    
-    @app.route('/api/accounts', methods=['POST'])
-    def add_account():
-        """Add or update an account."""
-        data = request.json
-        try:
-            account_service.configure(
-                data['platform'],
-                data['email'],
-                data['password']
-            )
-            return jsonify({'platform': data['platform'], 'message': 'Account saved successfully'}), 201
-        except Exception as e:
-            return jsonify({'error': str(e)}), 400
-    
-    @app.route('/api/accounts/<platform>', methods=['DELETE'])
-    def delete_account(platform):
-        """Delete an account."""
-        if account_service.remove_account(platform):
-            return jsonify({'message': 'Account deleted successfully'})
-        return jsonify({'error': 'Account not found'}), 404
-    
-    @app.route('/api/accounts/<platform>/verify', methods=['POST'])
-    def verify_account(platform):
-        """Verify account credentials."""
-        success = account_service.verify(platform)
-        return jsonify({'verified': success})
-    
-    @app.route('/api/downloads', methods=['POST'])
-    def download():
-        """Download activities."""
-        from datetime import datetime
-        data = request.json
-        try:
-            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-            result = download_service.download(
-                platform=data['account_id'],
-                start_date=start_date,
-                end_date=end_date,
-                activity_type=data.get('activity_types'),
-                file_format=data.get('format', 'tcx')
-            )
-            save_operation_history(
-                operation_type='download',
-                platform=data['account_id'],
-                start_date=data['start_date'],
-                end_date=data['end_date'],
-                total=result.get('total', 0),
-                success=result.get('downloaded', 0),
-                skipped=result.get('skipped', 0),
-                failed=result.get('failed', 0),
-                details=result.get('details')
-            )
-            return jsonify(result)
-        except Exception as e:
-            return jsonify({'error': str(e)}), 400
-    
-    @app.route('/api/tasks', methods=['GET'])
-    def list_tasks():
-        """List all sync tasks."""
-        if scheduler_service is None:
-            return jsonify({'tasks': [], 'warning': 'scheduler_unavailable'}), 200
+        cache.set('accounts', accounts, timeout=LIST_CACHE_TIMEOUT)
+    return _conditional_json({'accounts': accounts})
+
+
+def add_account():
+    """Add or update an account."""
+    account_service = _service('account')
+    data, error = _parse_json(('platform', 'email', 'password'), _ACCOUNT_FIELDS)
+    if error:
+        return error
+    try:
+        account_service.configure(
+            data['platform'],
+            data['email'],
+            data['password']
+        )
+        _service('cache').delete('accounts', 'gear')
+        return jsonify({'platform': data['platform'], 'message': 'Account saved successfully'}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def delete_account(platform):
+    """Delete an account."""
+    account_service = _service('account')
+    if account_service.remove_account(platform):
+        _service('cache').delete('accounts', 'gear')
+        return jsonify({'message': 'Account deleted successfully'})
+    return jsonify({'error': 'Account not found'}), 404
+
+
+def verify_account(platform):
+    """Verify account credentials."""
+    account_service = _service('account')
+    success = account_service.verify(platform)
+    return jsonify({'verified': success})
+
+
+def download():
+    """Download activities."""
+    download_service = _service('download')
+    data, error = _parse_json(('account_id', 'start_date', 'end_date'), _DOWNLOAD_FIELDS)
+    if error:
+        return error
+    try:
+        start_date = _parse_date(data['start_date'])
+        end_date = _parse_date(data['end_date'])
+        result = download_service.download(
+            platform=data['account_id'],
+            start_date=start_date,
+            end_date=end_date,
+            activity_type=data.get('activity_types'),
+            file_format=data.get('format', 'tcx')
+        )
+        _service('history_writer').put(
+            operation_type='download',
+            platform=data['account_id'],
+            start_date=data['start_date'],
+            end_date=data['end_date'],
+            total=result.get('total', 0),
+            success=result.get('downloaded', 0),
+            skipped=result.get('skipped', 0),
+            failed=result.get('failed', 0),
+            details=result.get('details')
+        )
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def list_tasks():
+    """List all sync tasks."""
+    scheduler_service = _service('scheduler')
+    if scheduler_service is None:
+        return jsonify({'tasks': [], 'warning': 'scheduler_unavailable'}), 200
+    cache = _service('cache')
+    tasks = cache.get('tasks')
+    if tasks is None:
         tasks = scheduler_service.list_tasks()
-        return jsonify({'tasks': tasks})
-    
-    @app.route('/api/tasks', methods=['POST'])
-    def create_task():
-        """Create a new sync task."""
-        if scheduler_service is None:
-            return jsonify({'error': 'scheduler_unavailable'}), 503
-        data = request.json
-        try:
-            task_id = scheduler_service.create_task(
-                account_id=data['account_id'],
-                name=data['name'],
-                cron_expression=data['cron_expression'],
-                file_format=data.get('format', 'tcx'),
-                activity_types=data.get('activity_types')
-            )
-            return jsonify({'id': task_id, 'message': 'Task created successfully'}), 201
-        except Exception as e:
-            return jsonify({'error': str(e)}), 400
-    
-    @app.route('/api/tasks/<int:task_id>/enable', methods=['POST'])
-    def enable_task(task_id):
-        """Enable a sync task."""
-        if scheduler_service is None:
-            return jsonify({'error': 'scheduler_unavailable'}), 503
-        if scheduler_service.enable_task(task_id):
-            return jsonify({'message': 'Task enabled successfully'})
-        return jsonify({'error': 'Task not found'}), 404
-    
-    @app.route('/api/tasks/<int:task_id>/disable', methods=['POST'])
-    def disable_task(task_id):
-        """Disable a sync task."""
-        if scheduler_service is None:
-            return jsonify({'error': 'scheduler_unavailable'}), 503
-        if scheduler_service.disable_task(task_id):
-            return jsonify({'message': 'Task disabled successfully'})
-        return jsonify({'error': 'Task not found'}), 404
-    
-    @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
-    def delete_task(task_id):
-        """Delete a sync task."""
+        cache.set('tasks', tasks, timeout=LIST_CACHE_TIMEOUT)
+    return jsonify({'tasks': tasks})
+
+
+def create_task():
+    """Create a new sync task."""
+    scheduler_service = _service('scheduler')
+    if scheduler_service is None:
+        return jsonify({'error': 'scheduler_unavailable'}), 503
+    data, error = _parse_json(('account_id', 'name', 'cron_expression'), _TASK_FIELDS)
+    if error:
+        return error
+    try:
+        task_id = scheduler_service.create_task(
+            account_id=data['account_id'],
+            name=data['name'],
+            cron_expression=data['cron_expression'],
+            file_format=data.get('format', 'tcx'),
+            activity_types=data.get('activity_types')
+        )
+        _service('cache').delete('tasks')
+        return jsonify({'id': task_id, 'message': 'Task created successfully'}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _task_action(method: str, message: str):
+    """Build a view that applies one scheduler action to a task.
+
+    Args:
+        method: SchedulerService method to call with the task id.
+        message: Success message returned to the client.
+    """
+    def view(task_id):
+        scheduler_service = _service('scheduler')
         if scheduler_service is None:
             return jsonify({'error': 'scheduler_unavailable'}), 503
-        if scheduler_service.delete_task(task_id):
-            return jsonify({'message': 'Task deleted successfully'})
+        if getattr(scheduler_service, method)(task_id):
+            _service('cache').delete('tasks')
+            return jsonify({'message': message})
         return jsonify({'error': 'Task not found'}), 404
 
-    @app.route('/api/transfer', methods=['POST'])
-    def transfer():
-        from datetime import datetime
-        data = request.json
-        
-        # Validate required fields
-        if not data:
-            return jsonify({'error': 'Request body is required'}), 400
-        
-        if 'start_date' not in data or 'end_date' not in data:
-            return jsonify({'error': 'start_date and end_date are required'}), 400
-        
-        # Validate date format
-        try:
-            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-        
-        # Validate date range
-        if start_date > end_date:
-            return jsonify({'error': 'start_date must be before or equal to end_date'}), 400
-        
-        # Validate sport_types
-        sport_types = data.get('sport_types')
-        if sport_types is not None and not isinstance(sport_types, list):
-            return jsonify({'error': 'sport_types must be a list'}), 400
-        
-        transfer_service = TransferService()
-        try:
-            result = transfer_service.transfer(
+    # The function name doubles as the endpoint name
+    view.__name__ = method
+    return view
+
+
+enable_task = _task_action('enable_task', 'Task enabled successfully')
+disable_task = _task_action('disable_task', 'Task disabled successfully')
+delete_task = _task_action('delete_task', 'Task deleted successfully')
+
+
+def transfer():
+    data, error = _parse_json(('start_date', 'end_date'))
+    if error:
+        return error
+    start_date, end_date, sport_types, error = _parse_date_range(data)
+    if error:
+        return error
+    
+    transfer_service = _transfer_service()
+    try:
+        if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+            result, activity_results = transfer_service.iter_transfer(
                 start_date=start_date,
                 end_date=end_date,
                 sport_types=sport_types
             )
-            save_operation_history(
-                operation_type='transfer',
-                platform='coros->garmin',
-                start_date=data['start_date'],
-                end_date=data['end_date'],
-                total=result.get('total', 0),
-                success=result.get('uploaded', 0),
-                skipped=result.get('skipped', 0),
-                failed=len(result.get('failed', [])),
-                details=result
+            return Response(
+                stream_with_context(_stream_transfer(data, result, activity_results)),
+                mimetype=NDJSON_MIMETYPE,
             )
-            return jsonify(result)
-        except ValueError as e:
-            return jsonify({'error': str(e)}), 400
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-
-    @app.route('/api/history/<operation_type>', methods=['GET'])
-    def get_history(operation_type):
-        """Get operation history by type (download or transfer)."""
-        if operation_type not in ('download', 'transfer'):
-            return jsonify({'error': 'Invalid operation type'}), 400
-        limit = request.args.get('limit', 50, type=int)
-        history = get_operation_history(operation_type=operation_type, limit=limit)
-        return jsonify({'history': history})
-
-    @app.route('/api/history/<operation_type>/<int:record_id>', methods=['DELETE'])
-    def delete_history_record(operation_type, record_id):
-        """Delete a single history record."""
-        if operation_type not in ('download', 'transfer'):
-            return jsonify({'error': 'Invalid operation type'}), 400
-        if delete_operation_history(record_id):
-            return jsonify({'message': 'Deleted successfully'})
-        return jsonify({'error': 'Record not found'}), 404
-
-    # Transfer settings API
-    @app.route('/api/settings/transfer', methods=['GET'])
-    def get_transfer_settings():
-        """Get current transfer settings."""
-        settings = transfer_settings_service.get_settings()
-        return jsonify({'settings': settings, 'version': settings.get('version', 1)})
-
-    @app.route('/api/settings/transfer', methods=['PUT'])
-    def update_transfer_settings():
-        """Update transfer settings."""
-        data = request.json
-        if not data:
-            return jsonify({'error': 'Request body is required'}), 400
-        
-        settings = data.get('settings')
-        if not settings or not isinstance(settings, dict):
-            return jsonify({'error': 'settings object is required'}), 400
-        
-        normalized, errors = transfer_settings_service.save_settings(settings)
-        if errors:
-            return jsonify({
-                'error': 'validation_error',
-                'fields': errors
-            }), 400
-        
-        return jsonify({'settings': normalized, 'version': normalized.get('version', 1)})
-
-    @app.route('/api/settings/transfer/preview', methods=['POST'])
-    def preview_transfer_settings():
-        """Preview rendered metadata for an activity."""
-        data = request.json
-        if not data:
-            return jsonify({'error': 'Request body is required'}), 400
-        
-        activity = data.get('activity')
-        if not activity or not isinstance(activity, dict):
-            return jsonify({'error': 'activity object is required'}), 400
-        
-        # Optional settings override
-        settings = data.get('settings')
-        
-        result = transfer_settings_service.preview(activity, settings)
+
+        result = transfer_service.transfer(
+            start_date=start_date,
+            end_date=end_date,
+            sport_types=sport_types
+        )
+        _save_transfer_history(data, result)
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _save_transfer_history(data, result):
+    """Record a finished transfer in the operation history."""
+    _service('history_writer').put(
+        operation_type='transfer',
+        platform='coros->garmin',
+        start_date=data['start_date'],
+        end_date=data['end_date'],
+        total=result.get('total', 0),
+        success=result.get('uploaded', 0),
+        skipped=result.get('skipped', 0),
+        failed=len(result.get('failed', [])),
+        details=result
+    )
+
+
+def _stream_transfer(data, result, activity_results):
+    """Yield NDJSON lines: one per finished activity, then the summary."""
+    dumps = current_app.json.dumps
+    for activity_result in activity_results:
+        yield dumps({'activity': activity_result}) + '\n'
+    _save_transfer_history(data, result)
+    yield dumps({'result': result}) + '\n'
+
+
+def get_history(operation_type):
+    """Get operation history by type (download or transfer)."""
+    if operation_type not in ('download', 'transfer'):
+        return jsonify({'error': 'Invalid operation type'}), 400
+    limit = request.args.get('limit', 50, type=int)
+    # Write any queued records first so callers see their own operations
+    _service('history_writer').flush()
+    history_cache = _service('history_cache')
+    history = history_cache.get((operation_type, limit))
+    if history is None:
+        history = get_operation_history(operation_type=operation_type, limit=limit)
+        history_cache.set((operation_type, limit), history)
+    return jsonify({'history': history})
+
+
+def delete_history_record(operation_type, record_id):
+    """Delete a single history record."""
+    if operation_type not in ('download', 'transfer'):
+        return jsonify({'error': 'Invalid operation type'}), 400
+    if delete_operation_history(record_id):
+        _service('history_cache').clear()
+        return jsonify({'message': 'Deleted successfully'})
+    return jsonify({'error': 'Record not found'}), 404
+
+
+# Transfer settings API
+def get_transfer_settings():
+    """Get current transfer settings."""
+    transfer_settings_service = _service('transfer_settings')
+    settings = transfer_settings_service.get_settings()
+    return jsonify({'settings': settings, 'version': settings.get('version', 1)})
+
+
+def update_transfer_settings():
+    """Update transfer settings."""
+    transfer_settings_service = _service('transfer_settings')
+    data, error = _parse_json()
+    if error:
+        return error
+    
+    settings = data.get('settings')
+    if not settings or not isinstance(settings, dict):
+        return jsonify({'error': 'settings object is required'}), 400
+    
+    normalized, errors = transfer_settings_service.save_settings(settings)
+    if errors:
+        return jsonify({
+            'error': 'validation_error',
+            'fields': errors
+        }), 400
+    
+    return jsonify({'settings': normalized, 'version': normalized.get('version', 1)})
 
-    @app.route('/api/garmin/gear', methods=['GET'])
-    def get_garmin_gear():
-        """Get Garmin gear list (best-effort)."""
-        try:
-            garmin_client = account_service.get_client('garmin')
-            if not garmin_client:
-                return jsonify({
-                    'gear': [],
-                    'warning': 'Garmin account not configured or authentication failed'
-                })
-            
-            # Try to fetch gear from Garmin
-            # Note: garmin API for gear is /gear-service/gear/filterGear
-            try:
-                import garth
-                gear_data = garth.connectapi('/gear-service/gear/filterGear', params={'start': 0, 'limit': 100})
-                if gear_data and isinstance(gear_data, list):
-                    gear_list = [
-                        {
-                            'id': str(g.get('uuid', g.get('gearPk', ''))),
-                            'name': g.get('displayName', g.get('customMakeModel', 'Unknown')),
-                            'type': g.get('gearTypeName', ''),
-                        }
-                        for g in gear_data
-                    ]
-                    return jsonify({'gear': gear_list})
-                return jsonify({'gear': [], 'warning': 'No gear found'})
-            except Exception as e:
-                logger.warning(f"Failed to fetch Garmin gear: {e}")
-                return jsonify({'gear': [], 'warning': f'Failed to fetch gear: {str(e)}'})
-        except Exception as e:
-            logger.error(f"Failed to get Garmin gear: {e}")
-            return jsonify({'gear': [], 'warning': str(e)})
 
-    # Transfer job queue APIs
-    @app.route('/api/transfer/jobs', methods=['POST'])
-    def create_transfer_job():
-        """Create a new transfer job.
-        
-        Fetches activities from COROS for the date range and creates a job with items.
-        """
-        from datetime import datetime as dt
-        data = request.json
-        
-        if not data:
-            return jsonify({'error': 'Request body is required'}), 400
-        
-        # Validate dates
-        if 'start_date' not in data or 'end_date' not in data:
-            return jsonify({'error': 'start_date and end_date are required'}), 400
-        
-        try:
-            start_date = dt.strptime(data['start_date'], '%Y-%m-%d').date()
-            end_date = dt.strptime(data['end_date'], '%Y-%m-%d').date()
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-        
-        if start_date > end_date:
-            return jsonify({'error': 'start_date must be before or equal to end_date'}), 400
-        
-        sport_types = data.get('sport_types')
-        if sport_types is not None and not isinstance(sport_types, list):
-            return jsonify({'error': 'sport_types must be a list'}), 400
-        
-        # Get COROS client
-        coros_client = account_service.get_client('coros')
-        if not coros_client:
-            return jsonify({'error': 'COROS account not configured or authentication failed'}), 400
-        
-        # Verify Garmin is also configured (needed later for actual transfer)
+def preview_transfer_settings():
+    """Preview rendered metadata for an activity."""
+    transfer_settings_service = _service('transfer_settings')
+    data, error = _parse_json()
+    if error:
+        return error
+    
+    activity = data.get('activity')
+    if not activity or not isinstance(activity, dict):
+        return jsonify({'error': 'activity object is required'}), 400
+    
+    # Optional settings override
+    settings = data.get('settings')
+    
+    result = transfer_settings_service.preview(activity, settings)
+    return jsonify(result)
+
+
+def get_garmin_gear():
+    """Get Garmin gear list (best-effort).
+
+    Gear rarely changes, so a fetched list is cached for GEAR_CACHE_TIMEOUT
+    seconds (or until the accounts change); failures are not cached.
+    """
+    account_service = _service('account')
+    cache = _service('cache')
+    gear_list = cache.get('gear')
+    if gear_list is not None:
+        return jsonify({'gear': gear_list})
+    try:
         garmin_client = account_service.get_client('garmin')
         if not garmin_client:
-            return jsonify({'error': 'Garmin account not configured or authentication failed'}), 400
+            return jsonify({
+                'gear': [],
+                'warning': 'Garmin account not configured or authentication failed'
+            })
         
+        # Try to fetch gear from Garmin
+        # Note: garmin API for gear is /gear-service/gear/filterGear
         try:
-            # Fetch activities from COROS
-            activities = coros_client.get_activities(start_date, end_date, sport_types)
-            
-            if not activities:
-                return jsonify({
-                    'job_id': None,
-                    'message': 'No activities found for the specified date range',
-                    'total_items': 0
-                })
-            
-            # Create job with items
-            job_id = transfer_queue_service.create_job(
-                start_date=data['start_date'],
-                end_date=data['end_date'],
-                activities=activities,
-                sport_types=sport_types,
-            )
-            
-            return jsonify({
-                'job_id': job_id,
-                'message': f'Created transfer job with {len(activities)} activities',
-                'total_items': len(activities)
-            }), 201
-            
+            gear_data = garth.connectapi('/gear-service/gear/filterGear', params={'start': 0, 'limit': 100})
+            if gear_data and isinstance(gear_data, list):
+                gear_list = [
+                    {
+                        'id': str(g.get('uuid', g.get('gearPk', ''))),
+                        'name': g.get('displayName', g.get('customMakeModel', 'Unknown')),
+                        'type': g.get('gearTypeName', ''),
+                    }
+                    for g in gear_data
+                ]
+                cache.set('gear', gear_list, timeout=GEAR_CACHE_TIMEOUT)
+                return jsonify({'gear': gear_list})
+            return jsonify({'gear': [], 'warning': 'No gear found'})
         except Exception as e:
-            logger.error(f"Failed to create transfer job: {e}")
-            return jsonify({'error': str(e)}), 500
-
-    @app.route('/api/transfer/jobs', methods=['GET'])
-    def list_transfer_jobs():
-        """List recent transfer jobs."""
-        limit = request.args.get('limit', 20, type=int)
-        if limit < 1 or limit > 100:
-            limit = 20
+            logger.warning(f"Failed to fetch Garmin gear: {e}")
+            return jsonify({'gear': [], 'warning': f'Failed to fetch gear: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Failed to get Garmin gear: {e}")
+        return jsonify({'gear': [], 'warning': str(e)})
+
+
+# Transfer job queue APIs
+def create_transfer_job():
+    """Create a new transfer job.
+    
+    Fetches activities from COROS for the date range and creates a job with items.
+    """
+    account_service = _service('account')
+    transfer_queue_service = _service('transfer_queue')
+    data, error = _parse_json(('start_date', 'end_date'))
+    if error:
+        return error
+    start_date, end_date, sport_types, error = _parse_date_range(data)
+    if error:
+        return error
+    
+    # Get COROS client
+    coros_client = account_service.get_client('coros')
+    if not coros_client:
+        return jsonify({'error': 'COROS account not configured or authentication failed'}), 400
+    
+    # Verify Garmin is also configured (needed later for actual transfer)
+    garmin_client = account_service.get_client('garmin')
+    if not garmin_client:
+        return jsonify({'error': 'Garmin account not configured or authentication failed'}), 400
+    
+    try:
+        # Fetch activities from COROS
+        activities = coros_client.get_activities(start_date, end_date, sport_types)
+        
+        if not activities:
+            return jsonify({
+                'job_id': None,
+                'message': 'No activities found for the specified date range',
+                'total_items': 0
+            })
         
-        jobs = transfer_queue_service.list_jobs(limit=limit)
-        return jsonify({'jobs': jobs})
-
-    @app.route('/api/transfer/jobs/<int:job_id>', methods=['GET'])
-    def get_transfer_job(job_id):
-        """Get a transfer job with its items."""
-        job = transfer_queue_service.get_job(job_id)
-        if not job:
-            return jsonify({'error': 'Job not found'}), 404
+        # Create job with items
+        job_id = transfer_queue_service.create_job(
+            start_date=data['start_date'],
+            end_date=data['end_date'],
+            activities=activities,
+            sport_types=sport_types,
+        )
         
-        # Get items (optionally filtered by status)
-        status_filter = request.args.get('status')
-        items_limit = request.args.get('items_limit', 100, type=int)
+        return jsonify({
+            'job_id': job_id,
+            'message': f'Created transfer job with {len(activities)} activities',
+            'total_items': len(activities)
+        }), 201
         
+    except Exception as e:
+        logger.error(f"Failed to create transfer job: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+def list_transfer_jobs():
+    """List recent transfer jobs."""
+    transfer_queue_service = _service('transfer_queue')
+    limit = request.args.get('limit', 20, type=int)
+    if limit < 1 or limit > 100:
+        limit = 20
+    
+    jobs = transfer_queue_service.list_jobs(limit=limit)
+    return jsonify({'jobs': jobs})
+
+
+def get_transfer_job(job_id):
+    """Get a transfer job with its items."""
+    transfer_queue_service = _service('transfer_queue')
+    job = transfer_queue_service.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # Get items (optionally filtered by status); pass the last item id as
+    # after_id for the next page and a comma-separated fields list to trim rows
+    status_filter = request.args.get('status')
+    items_limit = request.args.get('items_limit', 100, type=int)
+    after_id = request.args.get('after_id', 0, type=int)
+    fields = request.args.get('fields')
+    
+    try:
         items = transfer_queue_service.get_job_items(
             job_id,
             status=status_filter,
-            limit=items_limit
+            limit=items_limit,
+            after_id=after_id,
+            fields=fields.split(',') if fields else None
         )
-        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'job': job,
+        'items': items
+    })
+
+
+def delete_transfer_job(job_id):
+    """Delete a transfer job and all its items."""
+    transfer_queue_service = _service('transfer_queue')
+    if transfer_queue_service.delete_job(job_id):
+        return jsonify({'message': 'Job deleted successfully'})
+    return jsonify({'error': 'Job not found'}), 404
+
+
+def cancel_transfer_job(job_id):
+    """Cancel a transfer job."""
+    transfer_queue_service = _service('transfer_queue')
+    job = transfer_queue_service.cancel_job(job_id)
+    if job:
         return jsonify({
-            'job': job,
-            'items': items
+            'message': 'Job cancelled successfully',
+            'job': job
         })
+    return jsonify({'error': 'Job not found or cannot be cancelled'}), 400
+
 
-    @app.route('/api/transfer/jobs/<int:job_id>', methods=['DELETE'])
-    def delete_transfer_job(job_id):
-        """Delete a transfer job and all its items."""
-        if transfer_queue_service.delete_job(job_id):
-            return jsonify({'message': 'Job deleted successfully'})
+def start_transfer_job(job_id):
+    """Start processing a transfer job."""
+    transfer_queue_service = _service('transfer_queue')
+    job = transfer_queue_service.get_job(job_id)
+    if not job:
         return jsonify({'error': 'Job not found'}), 404
 
-    @app.route('/api/transfer/jobs/<int:job_id>/cancel', methods=['POST'])
-    def cancel_transfer_job(job_id):
-        """Cancel a transfer job."""
-        if transfer_queue_service.cancel_job(job_id):
-            # Refresh job data
-            job = transfer_queue_service.get_job(job_id)
-            return jsonify({
-                'message': 'Job cancelled successfully',
-                'job': job
-            })
-        return jsonify({'error': 'Job not found or cannot be cancelled'}), 400
+    worker = get_worker()
+    if worker.process_job(job_id, job=job):
+        return jsonify({
+            'message': 'Job started',
+            'job_id': job_id,
+            'worker_running': worker.is_running
+        })
+    return jsonify({'error': 'Job cannot be started (check status)'}), 400
 
-    @app.route('/api/transfer/jobs/<int:job_id>/start', methods=['POST'])
-    def start_transfer_job(job_id):
-        """Start processing a transfer job."""
-        job = transfer_queue_service.get_job(job_id)
-        if not job:
-            return jsonify({'error': 'Job not found'}), 404
 
-        worker = get_worker()
-        if worker.process_job(job_id):
-            return jsonify({
-                'message': 'Job started',
-                'job_id': job_id,
-                'worker_running': worker.is_running
-            })
-        return jsonify({'error': 'Job cannot be started (check status)'}), 400
+# Worker control APIs
+def get_worker_status():
+    """Get worker status."""
+    worker = get_worker()
+    return _conditional_json({
+        'running': worker.is_running,
+        'paused': worker.is_paused,
+        'current_job_id': worker.current_job_id
+    })
 
-    # Worker control APIs
-    @app.route('/api/transfer/worker/status', methods=['GET'])
-    def get_worker_status():
-        """Get worker status."""
-        worker = get_worker()
+
+def pause_worker():
+    """Pause the worker."""
+    worker = get_worker()
+    if worker.pause():
         return jsonify({
-            'running': worker.is_running,
-            'paused': worker.is_paused,
+            'message': 'Worker paused',
+            'paused': True,
             'current_job_id': worker.current_job_id
         })
+    return jsonify({'error': 'Worker is not running'}), 400
 
-    @app.route('/api/transfer/worker/pause', methods=['POST'])
-    def pause_worker():
-        """Pause the worker."""
-        worker = get_worker()
-        if worker.pause():
-            return jsonify({
-                'message': 'Worker paused',
-                'paused': True,
-                'current_job_id': worker.current_job_id
-            })
-        return jsonify({'error': 'Worker is not running'}), 400
 
-    @app.route('/api/transfer/worker/resume', methods=['POST'])
-    def resume_worker():
-        """Resume the worker."""
-        worker = get_worker()
-        if worker.resume():
-            return jsonify({
-                'message': 'Worker resumed',
-                'paused': False,
-                'current_job_id': worker.current_job_id
-            })
-        return jsonify({'error': 'Worker is not running'}), 400
-
-    @app.route('/api/transfer/worker/stop', methods=['POST'])
-    def stop_worker():
-        """Stop the worker."""
-        worker = get_worker()
-        if worker.stop(wait=False):
-            return jsonify({'message': 'Worker stopped', 'running': False})
-        return jsonify({'error': 'Failed to stop worker'}), 500
-
-    # Rerun metadata for failed items
-    @app.route('/api/transfer/jobs/<int:job_id>/rerun-metadata', methods=['POST'])
-    def rerun_metadata(job_id):
-        """Rerun metadata application for items with metadata_status='failed'."""
-        from fitness_toolkit.services.transfer_queue import METADATA_STATUS_FAILED
-        from fitness_toolkit.services.transfer_worker import TransferWorker
-
-        job = transfer_queue_service.get_job(job_id)
-        if not job:
-            return jsonify({'error': 'Job not found'}), 404
-
-        # Get items with failed metadata
-        items = transfer_queue_service.get_job_items(job_id, limit=1000)
-        failed_items = [i for i in items if i.get('metadata_status') == METADATA_STATUS_FAILED]
-
-        if not failed_items:
-            return jsonify({
-                'message': 'No items with failed metadata',
-                'rerun_count': 0
-            })
+def resume_worker():
+    """Resume the worker."""
+    worker = get_worker()
+    if worker.resume():
+        return jsonify({
+            'message': 'Worker resumed',
+            'paused': False,
+            'current_job_id': worker.current_job_id
+        })
+    return jsonify({'error': 'Worker is not running'}), 400
 
-        # Get Garmin client
-        garmin_client = account_service.get_client('garmin')
-        if not garmin_client:
-            return jsonify({'error': 'Garmin account not configured'}), 400
 
-        # Create a temporary worker to rerun metadata
-        temp_worker = TransferWorker(
-            queue_service=transfer_queue_service,
-            account_service=account_service,
-            settings_service=transfer_settings_service,
-        )
+def stop_worker():
+    """Stop the worker."""
+    worker = get_worker()
+    if worker.stop(wait=False):
+        return jsonify({'message': 'Worker stopped', 'running': False})
+    return jsonify({'error': 'Failed to stop worker'}), 500
+
+
+# Rerun metadata for failed items
+def rerun_metadata(job_id):
+    """Rerun metadata application for items with metadata_status='failed'."""
+    account_service = _service('account')
+    transfer_settings_service = _service('transfer_settings')
+    transfer_queue_service = _service('transfer_queue')
+
+    job = transfer_queue_service.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
 
-        settings = job.get('settings_snapshot', {})
-        rerun_count = 0
-        errors = []
-
-        for item in failed_items:
-            garmin_id = item.get('garmin_id')
-            if not garmin_id or garmin_id == 'duplicate':
-                continue
-
-            try:
-                metadata_status, metadata_error = temp_worker._apply_metadata(
-                    garmin_client, garmin_id, item, settings
-                )
-                transfer_queue_service.update_item_status(
-                    item['id'],
-                    item['status'],  # Keep original status
-                    metadata_status=metadata_status,
-                    metadata_error=metadata_error,
-                )
-                if metadata_status != METADATA_STATUS_FAILED:
-                    rerun_count += 1
-                else:
-                    errors.append(f"Item {item['id']}: {metadata_error}")
-            except Exception as e:
-                errors.append(f"Item {item['id']}: {str(e)}")
+    # Get items with failed metadata
+    failed_items = transfer_queue_service.get_job_items_by_metadata_status(
+        job_id, METADATA_STATUS_FAILED, fields=list(METADATA_ITEM_FIELDS)
+    )
 
+    if not failed_items:
         return jsonify({
-            'message': f'Reran metadata for {rerun_count} items',
-            'rerun_count': rerun_count,
-            'total_failed': len(failed_items),
-            'errors': errors[:10] if errors else []  # Limit errors returned
+            'message': 'No items with failed metadata',
+            'rerun_count': 0
         })
 
+    # Get Garmin client
+    garmin_client = account_service.get_client('garmin')
+    if not garmin_client:
+        return jsonify({'error': 'Garmin account not configured'}), 400
+
+    # Create a temporary worker to rerun metadata
+    temp_worker = TransferWorker(
+        queue_service=transfer_queue_service,
+        account_service=account_service,
+        settings_service=transfer_settings_service,
+    )
+
+    settings = job.get('settings_snapshot', {})
+    renderers = temp_worker._compile_renderers(settings)
+    rerun_count = 0
+    errors = []
+    # (metadata_status, metadata_error, item_id), written together at the end
+    updates = []
+
+    for item in failed_items:
+        garmin_id = item.get('garmin_id')
+        if not garmin_id or garmin_id == 'duplicate':
+            continue
+
+        try:
+            metadata_status, metadata_error = temp_worker._apply_metadata(
+                garmin_client, garmin_id, item, settings, renderers
+            )
+            updates.append((metadata_status, metadata_error, item['id']))
+            if metadata_status != METADATA_STATUS_FAILED:
+                rerun_count += 1
+            else:
+                errors.append(f"Item {item['id']}: {metadata_error}")
+        except Exception as e:
+            errors.append(f"Item {item['id']}: {str(e)}")
+
+    transfer_queue_service.bulk_update_metadata_status(updates)
+
+    return jsonify({
+        'message': f'Reran metadata for {rerun_count} items',
+        'rerun_count': rerun_count,
+        'total_failed': len(failed_items),
+        'errors': errors[:10] if errors else []  # Limit errors returned
+    })
+
+
+# URL rule, view function and HTTP methods for every route; the endpoint
+# name is the view function name.
+ROUTES = (
+    ('/', index, ('GET',)),
+    ('/api/accounts', list_accounts, ('GET',)),
+    ('/api/accounts', add_account, ('POST',)),
+    ('/api/accounts/<platform>', delete_account, ('DELETE',)),
+    ('/api/accounts/<platform>/verify', verify_account, ('POST',)),
+    ('/api/downloads', download, ('POST',)),
+    ('/api/tasks', list_tasks, ('GET',)),
+    ('/api/tasks', create_task, ('POST',)),
+    ('/api/tasks/<int:task_id>/enable', enable_task, ('POST',)),
+    ('/api/tasks/<int:task_id>/disable', disable_task, ('POST',)),
+    ('/api/tasks/<int:task_id>', delete_task, ('DELETE',)),
+    ('/api/transfer', transfer, ('POST',)),
+    ('/api/history/<operation_type>', get_history, ('GET',)),
+    ('/api/history/<operation_type>/<int:record_id>', delete_history_record, ('DELETE',)),
+    ('/api/settings/transfer', get_transfer_settings, ('GET',)),
+    ('/api/settings/transfer', update_transfer_settings, ('PUT',)),
+    ('/api/settings/transfer/preview', preview_transfer_settings, ('POST',)),
+    ('/api/garmin/gear', get_garmin_gear, ('GET',)),
+    ('/api/transfer/jobs', create_transfer_job, ('POST',)),
+    ('/api/transfer/jobs', list_transfer_jobs, ('GET',)),
+    ('/api/transfer/jobs/<int:job_id>', get_transfer_job, ('GET',)),
+    ('/api/transfer/jobs/<int:job_id>', delete_transfer_job, ('DELETE',)),
+    ('/api/transfer/jobs/<int:job_id>/cancel', cancel_transfer_job, ('POST',)),
+    ('/api/transfer/jobs/<int:job_id>/start', start_transfer_job, ('POST',)),
+    ('/api/transfer/worker/status', get_worker_status, ('GET',)),
+    ('/api/transfer/worker/pause', pause_worker, ('POST',)),
+    ('/api/transfer/worker/resume', resume_worker, ('POST',)),
+    ('/api/transfer/worker/stop', stop_worker, ('POST',)),
+    ('/api/transfer/jobs/<int:job_id>/rerun-metadata', rerun_metadata, ('POST',)),
+)
+
+
+def create_app(testing: "bool | None" = None):
+    """Create and configure Flask application.
+    
+    Args:
+        testing: If True, skip starting background scheduler. If None, auto-detect
+                 from TESTING environment variable.
+    """
+    app = Flask(__name__, 
+                template_folder='templates',
+                static_folder='static')
+    app.json = OrjsonProvider(app)
+    # The UI parses the JSON; skip key sorting and indentation
+    app.json.sort_keys = False
+    app.json.compact = True
+    
+    # Determine testing mode
+    if testing is None:
+        testing = os.environ.get("TESTING", "").lower() in ("1", "true", "yes")
+    app.config["TESTING"] = testing
+    
+    # Initialize database (once per database file; tests create many apps)
+    db_path = str(Config.DATABASE_PATH)
+    if db_path not in _initialized_db_paths:
+        init_db()
+        _initialized_db_paths.add(db_path)
+    
+    # Initialize services
+    account_service = AccountService()
+    # Services share one AccountService so logged-in clients (and their
+    # keep-alive HTTP sessions) are reused across endpoints
+    download_service = DownloadService(account_service=account_service)
+    if SchedulerService is None:
+        scheduler_service = None
+    else:
+        try:
+            scheduler_service = SchedulerService()
+        except Exception:
+            scheduler_service = None
+    transfer_settings_service = TransferSettingsService()
+    transfer_queue_service = TransferQueueService()
+    
+    history_cache = TTLCache(default_timeout=HISTORY_CACHE_TIMEOUT, maxsize=32)
+    history_writer = HistoryWriter(on_flush=history_cache.clear)
+    
+    # Start background threads only if not testing; without its thread the
+    # history writer saves records synchronously
+    if not testing:
+        if scheduler_service is not None:
+            scheduler_service.start()
+        history_writer.start()
+
+    # Register services for the module-level views, then the routes
+    app.extensions['fitness_toolkit'] = {
+        'account': account_service,
+        'download': download_service,
+        'scheduler': scheduler_service,
+        'transfer_settings': transfer_settings_service,
+        'transfer_queue': transfer_queue_service,
+        'cache': TTLCache(),
+        'history_cache': history_cache,
+        'history_writer': history_writer,
+    }
+    # API routes are called by the UI only: no automatic OPTIONS handling and
+    # no trailing-slash redirects
+    app.url_map.strict_slashes = False
+    for rule, view, methods in ROUTES:
+        app.add_url_rule(
+            rule, view_func=view, methods=methods, provide_automatic_options=False
+        )
+
     return app
 
 
+def serve(app, host: str, port: int):
+    """Serve the app, with waitress when it is installed.
+
+    waitress reuses a fixed pool of worker threads; without it the Werkzeug
+    server starts a thread per request. Either way a long download/transfer
+    call does not block the UI's other requests.
+    """
+    if waitress is not None:
+        waitress.serve(app, host=host, port=port, threads=SERVER_THREADS)
+    else:
+        app.run(host=host, port=port, debug=False, threaded=True)
+
+
 def main():
     """Run the Flask application."""
     app = create_app()
-    app.run(host=Config.WEB_HOST, port=Config.WEB_PORT, debug=False)
+    serve(app, Config.WEB_HOST, Config.WEB_PORT)
 
 
 if __name__ == '__main__':
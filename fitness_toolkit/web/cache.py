@@ -0,0 +1,67 @@
+"""Small in-memory cache for web API responses."""
+
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after a timeout.
+
+    Each app keeps its own instance, so entries never leak between apps (or
+    tests). Views that change the underlying data delete the affected keys.
+    """
+
+    def __init__(self, default_timeout: float = 60.0, maxsize: int = 128):
+        self.default_timeout = default_timeout
+        self.maxsize = maxsize
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, timeout: Optional[float] = None) -> None:
+        """
+        Cache a value.
+
+        Args:
+            key: Cache key
+            value: Value to cache (treated as read-only by callers)
+            timeout: Seconds until expiry (defaults to default_timeout)
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + timeout, value)
+
+    def delete(self, *keys: Hashable) -> None:
+        """Drop cached values (missing keys are ignored)."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,97 @@
+"""Batched writes of operation history records."""
+
+import atexit
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from fitness_toolkit.database import save_operation_history_many
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Queue operation history records and write them in batches.
+
+    Once started, a daemon thread flushes the queue every flush_interval
+    seconds, so a burst of requests shares one SQLite transaction instead of
+    paying a commit each. Until then (e.g. in tests) records are written as
+    they are queued. Readers call flush() first to see their own writes.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.1,
+        on_flush: Optional[Callable[[], None]] = None,
+    ):
+        self.flush_interval = flush_interval
+        self._on_flush = on_flush
+        self._queue: queue.SimpleQueue[dict[str, Any]] = queue.SimpleQueue()
+        self._flush_lock = threading.Lock()
+        # Rows from a failed write, retried ahead of the queue on next flush
+        self._pending: list[dict[str, Any]] = []
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, **row: Any) -> None:
+        """
+        Queue a history record.
+
+        Args:
+            **row: Keyword arguments of database.save_operation_history
+        """
+        self._queue.put(row)
+        if self._thread is None:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all queued records in one transaction.
+
+        If the write fails the records are kept and retried on the next flush.
+
+        Returns:
+            Number of records written
+        """
+        with self._flush_lock:
+            rows, self._pending = self._pending, []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not rows:
+                return 0
+            try:
+                save_operation_history_many(rows)
+            except Exception:
+                self._pending = rows
+                raise
+            if self._on_flush is not None:
+                self._on_flush()
+        return len(rows)
+
+    def start(self) -> None:
+        """Start the background flush thread (drained again at exit)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="history-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop the background thread and write anything still queued."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write operation history: {e}")
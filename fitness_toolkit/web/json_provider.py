@@ -0,0 +1,78 @@
+"""Flask JSON provider that uses orjson when it is installed."""
+
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+# dumps() keyword arguments that orjson output already satisfies
+_ORJSON_FORMATS = (("indent", 2), ("separators", (",", ":")))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, falling back to the stdlib json module.
+
+    Output matches DefaultJSONProvider: dates still go through Flask's default
+    (RFC 822 strings), keys are sorted when sort_keys is set, and non-string
+    keys are converted to strings. Non-ASCII text is written as UTF-8 rather
+    than escaped.
+    """
+
+    def _options(self, indent: "int | None" = None) -> int:
+        """Build the orjson option flags for the provider's settings."""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as JSON to a string.
+
+        orjson always writes compact output and only indents by two spaces;
+        any other keyword arguments fall back to the stdlib encoder.
+        """
+        if orjson is None or any(
+            item not in _ORJSON_FORMATS for item in kwargs.items()
+        ):
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(
+                obj, default=self.default, option=self._options(kwargs.get("indent"))
+            ).decode()
+        except TypeError:
+            # orjson rejects integers wider than 64 bits; the stdlib does not
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s: "str | bytes", **kwargs: Any) -> Any:
+        """Deserialize data as JSON from a string or bytes."""
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Serialize the arguments as JSON and wrap them in a response.
+
+        The orjson bytes are used as the body directly instead of being
+        decoded to a string and encoded again by the response.
+        """
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = orjson.dumps(
+                obj,
+                default=self.default,
+                option=self._options(2 if pretty else None) | orjson.OPT_APPEND_NEWLINE,
+            )
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
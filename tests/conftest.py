@@ -0,0 +1,149 @@
+"""Shared pytest fixtures."""
+
+import shutil
+import sqlite3
+import uuid
+from contextlib import closing
+
+import pytest
+
+from fitness_toolkit.config import Config
+from fitness_toolkit.database import close_connection, init_db
+from fitness_toolkit.web.app import create_app
+
+
+class CorosStub:
+    """COROS client stand-in that returns a fixed activity list."""
+
+    def __init__(self, activities=()):
+        self.activities = list(activities)
+
+    def get_activities(self, start_date, end_date, sport_types=None):
+        return self.activities
+
+
+class GarminStub:
+    """Garmin client stand-in for code that only checks a client exists."""
+
+
+@pytest.fixture
+def stub_accounts(monkeypatch):
+    """Make AccountService.get_client look clients up in a dict.
+
+    Both platforms start with a stub client (COROS with no activities).
+    Tests adjust the returned dict for their scenario: set
+    ``stub_accounts["coros"].activities``, or drop a platform to make it
+    unconfigured.
+    """
+    clients = {"coros": CorosStub(), "garmin": GarminStub()}
+    monkeypatch.setattr(
+        "fitness_toolkit.services.account.AccountService.get_client",
+        lambda self, platform: clients.get(platform),
+    )
+    return clients
+
+
+@pytest.fixture(scope="session")
+def schema_template(tmp_path_factory):
+    """Build the schema once; each test's database starts from a copy.
+
+    Under pytest-xdist each worker has its own tmp_path_factory base
+    directory (and in-memory databases are per process), so workers never
+    share a database file.
+    """
+    template = tmp_path_factory.mktemp("db") / "template.db"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Config, "DATABASE_PATH", template)
+        init_db()
+        # Closing the last connection checkpoints the WAL into the file
+        close_connection()
+    return template
+
+
+def _use_database(monkeypatch, database_path, downloads_dir):
+    """Point Config at the test's database and downloads dir."""
+    monkeypatch.setattr(Config, "DATABASE_PATH", database_path)
+    monkeypatch.setattr(Config, "DOWNLOADS_DIR", downloads_dir)
+
+
+@pytest.fixture(scope="session")
+def shared_downloads_dir(tmp_path_factory):
+    """Downloads dir for tests on in-memory databases, which write no files."""
+    return tmp_path_factory.mktemp("downloads")
+
+
+@pytest.fixture
+def db_path(monkeypatch, schema_template, shared_downloads_dir):
+    """Set up a private in-memory database for the test.
+
+    Shared-cache in-memory databases report contention as an error instead
+    of waiting for the lock, so tests that use the database from several
+    threads at once take file_db_path instead. So do tests that write
+    downloads, since the downloads dir here is shared.
+    """
+    db_uri = f"file:test_{uuid.uuid4().hex}?mode=memory&cache=shared"
+    # A shared in-memory database lives only while a connection is open
+    keep_alive = sqlite3.connect(db_uri, uri=True)
+    with closing(sqlite3.connect(schema_template)) as template:
+        template.backup(keep_alive)
+    _use_database(monkeypatch, db_uri, shared_downloads_dir)
+    yield db_uri
+    close_connection()
+    keep_alive.close()
+
+
+@pytest.fixture
+def file_db_path(tmp_path, monkeypatch, schema_template):
+    """Set up a file-backed temp database (and downloads dir) for the test."""
+    db_file = tmp_path / "test_fitness.db"
+    shutil.copyfile(schema_template, db_file)
+    downloads_dir = tmp_path / "downloads"
+    downloads_dir.mkdir()
+    _use_database(monkeypatch, db_file, downloads_dir)
+    return db_file
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory, schema_template):
+    """Build the Flask app once for the whole session.
+
+    Views read Config.DATABASE_PATH on every request, so tests still get
+    their own database through db_path. Tests must not change the app
+    itself (config, extensions); build a separate app for that.
+    """
+    app_db = tmp_path_factory.mktemp("app") / "app.db"
+    shutil.copyfile(schema_template, app_db)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Config, "DATABASE_PATH", app_db)
+        return create_app(testing=True)
+
+
+@pytest.fixture(scope="session")
+def app_client(app):
+    """One test client for the shared app.
+
+    The app sets no cookies and keeps no session, so with the cookie jar
+    turned off the client carries no state from one test to the next.
+    """
+    return app.test_client(use_cookies=False)
+
+
+@pytest.fixture
+def client(app, app_client, db_path):
+    """The shared test client, with an isolated database."""
+    # Drop what the app keeps between requests: cached responses, logged-in
+    # clients and the lazily created TransferService (tests patch its class)
+    services = app.extensions["fitness_toolkit"]
+    services["cache"].clear()
+    services["history_cache"].clear()
+    services["account"]._clients.clear()
+    services.pop("transfer", None)
+    return app_client
+
+
+@pytest.fixture(scope="session")
+def index_html(app_client):
+    """The home page body, fetched once (it has no per-request content)."""
+    response = app_client.get("/")
+    assert response.status_code == 200
+    return response.data
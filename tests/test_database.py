@@ -7,11 +7,16 @@ import pytest
 
 from fitness_toolkit.crypto import encrypt_password
 from fitness_toolkit.database import (
+    close_connection,
     delete_account,
     get_account,
+    get_connection,
+    get_operation_history,
     init_db,
     list_accounts,
     save_account,
+    save_operation_history_many,
+    write_connection,
 )
 
 
@@ -95,3 +100,82 @@ def test_delete_nonexistent_account(temp_db):
     """Test deleting a non-existent account."""
     result = delete_account("nonexistent")
     assert result is False
+
+
+def test_connection_reused_per_thread(temp_db, tmp_path):
+    """Test that a thread reuses its connection until the database path changes."""
+    import fitness_toolkit.database as db_module
+
+    conn = get_connection()
+    assert get_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    db_module.Config.DATABASE_PATH = tmp_path / "other.db"
+    try:
+        other = get_connection()
+        assert other is not conn
+
+        close_connection()
+        assert get_connection() is not other
+    finally:
+        db_module.Config.DATABASE_PATH = temp_db
+
+
+def test_save_operation_history_many(temp_db):
+    """Test writing several history records at once."""
+    rows = [
+        {
+            "operation_type": "download",
+            "platform": "coros",
+            "start_date": "2024-01-01",
+            "end_date": "2024-01-31",
+            "total": n,
+            "success": n,
+            "skipped": 0,
+            "failed": 0,
+            "details": {"n": n} if n else None,
+        }
+        for n in range(3)
+    ]
+    save_operation_history_many(rows)
+
+    history = get_operation_history(operation_type="download")
+    assert sorted(record["total"] for record in history) == [0, 1, 2]
+    assert {record["total"]: record["details"] for record in history} == {
+        0: None,
+        1: {"n": 1},
+        2: {"n": 2},
+    }
+
+
+def test_connection_pragmas(temp_db):
+    """Test that connections enforce foreign keys and keep temp tables in memory."""
+    conn = get_connection()
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_write_connection_rolls_back_on_error(temp_db):
+    """Test that a failed write leaves the database unchanged."""
+    with pytest.raises(RuntimeError):
+        with write_connection() as conn:
+            conn.execute(
+                "INSERT INTO accounts (platform, email, password_encrypted) VALUES (?, ?, ?)",
+                ("garmin", "test@example.com", "secret"),
+            )
+            raise RuntimeError("boom")
+
+    assert get_account("garmin") is None
+
+
+def test_operation_history_uses_type_index(temp_db):
+    """Test that history pages read the (operation_type, id) index without sorting."""
+    plan = get_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM operation_history "
+        "WHERE operation_type = ? ORDER BY id DESC LIMIT ?",
+        ("download", 50),
+    ).fetchall()
+    details = " ".join(row["detail"] for row in plan)
+    assert "idx_operation_history_type_id" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,60 @@
+"""Tests for the orjson-backed Flask JSON provider."""
+
+import json
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from fitness_toolkit.web.json_provider import OrjsonProvider
+
+
+@pytest.fixture
+def providers():
+    """Create the orjson provider and Flask's default for comparison."""
+    app = Flask(__name__)
+    # Providers only hold a weak reference to the app
+    yield OrjsonProvider(app), DefaultJSONProvider(app)
+
+
+def test_dumps_matches_default_provider(providers):
+    """Test that output decodes to the same data as Flask's default."""
+    orjson_provider, default_provider = providers
+    obj = {"b": 1, "a": datetime(2024, 1, 15, 8, 30), "name": "跑步"}
+
+    dumped = orjson_provider.dumps(obj)
+
+    assert json.loads(dumped) == json.loads(default_provider.dumps(obj))
+    assert dumped.index('"a"') < dumped.index('"b"')
+
+
+def test_dumps_converts_non_string_keys(providers):
+    """Test that integer keys are written as strings."""
+    orjson_provider, _ = providers
+    assert orjson_provider.loads(orjson_provider.dumps({100: "run"})) == {"100": "run"}
+
+
+def test_dumps_falls_back_for_wide_integers(providers):
+    """Test that integers orjson cannot encode still serialize."""
+    orjson_provider, _ = providers
+    assert orjson_provider.loads(orjson_provider.dumps({"n": 2**70})) == {"n": 2**70}
+
+
+def test_loads_accepts_bytes(providers):
+    """Test parsing request bodies given as bytes."""
+    orjson_provider, _ = providers
+    assert orjson_provider.loads(b'{"start_date": "2024-01-15"}') == {
+        "start_date": "2024-01-15"
+    }
+
+
+def test_response_body_matches_dumps(providers):
+    """Test that responses carry the orjson bytes plus a trailing newline."""
+    orjson_provider, _ = providers
+    payload = {"history": [{"id": 1, "status": "success"}]}
+
+    response = orjson_provider.response(payload)
+
+    assert response.mimetype == "application/json"
+    assert response.data == (orjson_provider.dumps(payload) + "\n").encode()
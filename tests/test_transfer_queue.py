@@ -1,11 +1,9 @@
 """Tests for transfer queue service and job APIs."""
 
 import json
-from unittest.mock import MagicMock, patch
 
 import pytest
 
-from fitness_toolkit.database import init_db
 from fitness_toolkit.services.transfer_queue import (
     TransferQueueService,
     JOB_STATUS_PENDING,
@@ -14,21 +12,23 @@ from fitness_toolkit.services.transfer_queue import (
     JOB_STATUS_CANCELLED,
     JOB_STATUS_FAILED,
     ITEM_STATUS_PENDING,
+    ITEM_STATUS_DOWNLOADING,
     ITEM_STATUS_SUCCESS,
     ITEM_STATUS_SKIPPED,
     ITEM_STATUS_FAILED,
 )
-from fitness_toolkit.web.app import create_app
 
 
-@pytest.fixture
-def db_path(tmp_path, monkeypatch):
-    """Set up temp database."""
-    db_file = tmp_path / "test_fitness.db"
-    monkeypatch.setattr("fitness_toolkit.config.Config.DATABASE_PATH", db_file)
-    monkeypatch.setattr("fitness_toolkit.database.Config.DATABASE_PATH", db_file)
-    init_db()
-    return db_file
+# Request body shared by the API tests that create a one-day job
+_ONE_DAY_JOB_BODY = json.dumps({"start_date": "2024-01-15", "end_date": "2024-01-15"})
+
+
+def _seed_jobs(queue_service, activities, count):
+    """Create count jobs directly, one per day from 2024-01-15."""
+    return [
+        queue_service.create_job(f"2024-01-{15 + i:02d}", f"2024-01-{15 + i:02d}", activities)
+        for i in range(count)
+    ]
 
 
 @pytest.fixture
@@ -37,17 +37,9 @@ def queue_service(db_path):
     return TransferQueueService()
 
 
-@pytest.fixture
-def client(db_path):
-    """Create test client with isolated database."""
-    app = create_app(testing=True)
-    with app.test_client() as test_client:
-        yield test_client
-
-
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_activities():
-    """Sample COROS activities for testing."""
+    """Sample COROS activities for testing (shared by the module; read-only)."""
     return [
         {
             "labelId": "activity-001",
@@ -137,11 +129,25 @@ class TestTransferQueueService:
 
     def test_list_jobs_limit(self, queue_service, sample_activities):
         """Test list jobs respects limit."""
-        for i in range(5):
-            queue_service.create_job(f"2024-01-{15+i:02d}", f"2024-01-{15+i:02d}", sample_activities[:1])
+        _seed_jobs(queue_service, sample_activities[:1], 5)
 
         jobs = queue_service.list_jobs(limit=3)
         assert len(jobs) == 3
+        # Newest first, even when jobs share a created_at second
+        assert [job["start_date"] for job in jobs] == ["2024-01-19", "2024-01-18", "2024-01-17"]
+
+    def test_get_next_pending_job(self, queue_service, sample_activities):
+        """Test that the oldest pending job is returned first."""
+        assert queue_service.get_next_pending_job() is None
+
+        first = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+        second = queue_service.create_job("2024-01-16", "2024-01-16", sample_activities)
+        assert queue_service.get_next_pending_job()["id"] == first
+
+        queue_service.update_job_status(first, JOB_STATUS_RUNNING)
+        job = queue_service.get_next_pending_job()
+        assert job["id"] == second
+        assert "settings_snapshot" in job
 
     def test_get_job_items(self, queue_service, sample_activities):
         """Test getting items for a job."""
@@ -168,6 +174,46 @@ class TestTransferQueueService:
         success_items = queue_service.get_job_items(job_id, status=ITEM_STATUS_SUCCESS)
         assert len(success_items) == 1
 
+    def test_get_job_items_fields_and_after_id(self, queue_service, sample_activities):
+        """Test selecting columns and paging from the last seen item id."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+
+        first_page = queue_service.get_job_items(job_id, limit=2, fields=["status"])
+        assert [set(item) for item in first_page] == [{"id", "status"}] * 2
+
+        second_page = queue_service.get_job_items(job_id, after_id=first_page[-1]["id"])
+        assert [item["label_id"] for item in second_page] == ["activity-003"]
+
+        with pytest.raises(ValueError):
+            queue_service.get_job_items(job_id, fields=["status; DROP TABLE transfer_jobs"])
+
+    def test_bulk_update_metadata_status(self, queue_service, sample_activities):
+        """Test filtering by and batch-updating metadata status."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+        first, second, _ = [item["id"] for item in queue_service.get_job_items(job_id)]
+
+        assert queue_service.bulk_update_metadata_status(
+            [("failed", "timeout", first), ("failed", "bad gear", second)]
+        ) == 2
+        failed = queue_service.get_job_items_by_metadata_status(job_id, "failed")
+        assert [item["metadata_error"] for item in failed] == ["timeout", "bad gear"]
+
+        queue_service.bulk_update_metadata_status([("success", None, first)])
+        failed = queue_service.get_job_items_by_metadata_status(
+            job_id, "failed", fields=["garmin_id"]
+        )
+        assert failed == [{"id": second, "garmin_id": None}]
+
+    def test_get_pending_items_after_id(self, queue_service, sample_activities):
+        """Test keyset paging over pending items."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+
+        first = queue_service.get_pending_items(job_id, limit=2)
+        assert [i["label_id"] for i in first] == ["activity-001", "activity-002"]
+
+        rest = queue_service.get_pending_items(job_id, after_id=first[-1]["id"], limit=2)
+        assert [i["label_id"] for i in rest] == ["activity-003"]
+
     def test_update_job_status(self, queue_service, sample_activities):
         """Test updating job status."""
         job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
@@ -213,12 +259,48 @@ class TestTransferQueueService:
         )
         assert result is True
 
-        updated_items = queue_service.get_job_items(job_id)
-        item = next(i for i in updated_items if i["id"] == items[0]["id"])
+        item = queue_service.get_item(items[0]["id"])
         assert item["status"] == ITEM_STATUS_SUCCESS
         assert item["garmin_id"] == "garmin-12345"
         assert item["local_path"] == "/path/to/file.fit"
 
+    def test_update_item_status_unchanged_is_noop(self, queue_service, sample_activities):
+        """Test that re-applying the current values does not write."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+        item_id = queue_service.get_job_items(job_id)[0]["id"]
+
+        assert queue_service.update_item_status(item_id, ITEM_STATUS_PENDING) is False
+        assert queue_service.update_item_status(item_id, ITEM_STATUS_FAILED, error_message="x") is True
+        assert queue_service.update_item_status(item_id, ITEM_STATUS_FAILED, error_message="x") is False
+        assert queue_service.update_item_status(item_id, ITEM_STATUS_FAILED, error_message="y") is True
+
+    def test_bulk_update_item_status(self, queue_service, sample_activities):
+        """Test updating several items in one call."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+        items = queue_service.get_job_items(job_id)
+
+        updated = queue_service.bulk_update_item_status(
+            [items[0]["id"], items[1]["id"]], ITEM_STATUS_FAILED
+        )
+        assert updated == [items[0]["id"], items[1]["id"]]
+        assert len(queue_service.get_job_items(job_id, status=ITEM_STATUS_FAILED)) == 2
+        assert queue_service.bulk_update_item_status([], ITEM_STATUS_FAILED) == []
+
+    def test_bulk_update_item_status_skips_non_pending(
+        self, queue_service, sample_activities
+    ):
+        """Test that items failed by a cancel are not moved back to downloading."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+        items = queue_service.get_job_items(job_id)
+        queue_service.update_item_status(items[0]["id"], ITEM_STATUS_FAILED)
+
+        updated = queue_service.bulk_update_item_status(
+            [item["id"] for item in items], ITEM_STATUS_DOWNLOADING
+        )
+
+        assert updated == [item["id"] for item in items[1:]]
+        assert queue_service.get_item(items[0]["id"])["status"] == ITEM_STATUS_FAILED
+
     def test_update_item_status_with_error(self, queue_service, sample_activities):
         """Test updating item status to failed with error."""
         job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
@@ -230,11 +312,14 @@ class TestTransferQueueService:
             error_message="Download failed: 404",
         )
 
-        updated_items = queue_service.get_job_items(job_id)
-        item = next(i for i in updated_items if i["id"] == items[0]["id"])
+        item = queue_service.get_item(items[0]["id"])
         assert item["status"] == ITEM_STATUS_FAILED
         assert item["error_message"] == "Download failed: 404"
 
+    def test_get_item_not_found(self, queue_service):
+        """Test getting a non-existent item."""
+        assert queue_service.get_item(99999) is None
+
     def test_increment_item_retry(self, queue_service, sample_activities):
         """Test incrementing retry count."""
         job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
@@ -279,10 +364,11 @@ class TestTransferQueueService:
 
         # Cancel the job
         result = queue_service.cancel_job(job_id)
-        assert result is True
+        assert result["status"] == JOB_STATUS_CANCELLED
+        assert result["failed_count"] == 2
 
         job = queue_service.get_job(job_id)
-        assert job["status"] == JOB_STATUS_CANCELLED
+        assert job == result
         assert job["completed_at"] is not None
 
         # Check that pending items were marked as failed
@@ -295,7 +381,7 @@ class TestTransferQueueService:
         queue_service.update_job_status(job_id, JOB_STATUS_COMPLETED)
 
         result = queue_service.cancel_job(job_id)
-        assert result is False
+        assert result is None
 
     def test_delete_job(self, queue_service, sample_activities):
         """Test deleting a job."""
@@ -352,59 +438,37 @@ class TestTransferJobAPIs:
         data = response.get_json()
         assert "before" in data["error"].lower()
 
-    def test_create_job_no_coros_account(self, client, monkeypatch):
+    def test_create_job_no_coros_account(self, client, stub_accounts):
         """Test create job when COROS not configured."""
-        mock_service = MagicMock()
-        mock_service.get_client.return_value = None
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
+        stub_accounts.clear()
 
         response = client.post(
             "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
+            data=_ONE_DAY_JOB_BODY,
             content_type="application/json",
         )
         assert response.status_code == 400
         data = response.get_json()
         assert "COROS" in data["error"]
 
-    def test_create_job_no_garmin_account(self, client, monkeypatch):
+    def test_create_job_no_garmin_account(self, client, stub_accounts):
         """Test create job when Garmin not configured."""
-        mock_coros = MagicMock()
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else None
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
+        del stub_accounts["garmin"]
 
         response = client.post(
             "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
+            data=_ONE_DAY_JOB_BODY,
             content_type="application/json",
         )
         assert response.status_code == 400
         data = response.get_json()
         assert "Garmin" in data["error"]
 
-    def test_create_job_no_activities(self, client, monkeypatch):
+    def test_create_job_no_activities(self, client, stub_accounts):
         """Test create job when no activities found."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = []
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
-
         response = client.post(
             "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
+            data=_ONE_DAY_JOB_BODY,
             content_type="application/json",
         )
         assert response.status_code == 200
@@ -412,22 +476,13 @@ class TestTransferJobAPIs:
         assert data["job_id"] is None
         assert data["total_items"] == 0
 
-    def test_create_job_success(self, client, monkeypatch, sample_activities):
+    def test_create_job_success(self, client, stub_accounts, sample_activities):
         """Test successful job creation."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = sample_activities
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
+        stub_accounts["coros"].activities = sample_activities
 
         response = client.post(
             "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
+            data=_ONE_DAY_JOB_BODY,
             content_type="application/json",
         )
         assert response.status_code == 201
@@ -442,23 +497,14 @@ class TestTransferJobAPIs:
         data = response.get_json()
         assert data["jobs"] == []
 
-    def test_list_jobs(self, client, monkeypatch, sample_activities):
+    def test_list_jobs(self, client, stub_accounts, sample_activities):
         """Test listing jobs."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = sample_activities
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
+        stub_accounts["coros"].activities = sample_activities
 
         # Create a job
         client.post(
             "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
+            data=_ONE_DAY_JOB_BODY,
             content_type="application/json",
         )
 
@@ -467,26 +513,10 @@ class TestTransferJobAPIs:
         data = response.get_json()
         assert len(data["jobs"]) == 1
 
-    def test_list_jobs_with_limit(self, client, monkeypatch, sample_activities):
+    def test_list_jobs_with_limit(self, client, queue_service, sample_activities):
         """Test listing jobs with limit parameter."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = sample_activities[:1]
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
-
-        # Create multiple jobs
-        for i in range(5):
-            client.post(
-                "/api/transfer/jobs",
-                json={"start_date": f"2024-01-{15+i:02d}", "end_date": f"2024-01-{15+i:02d}"},
-                content_type="application/json",
-            )
+        # Job creation through the API is covered by test_list_jobs
+        _seed_jobs(queue_service, sample_activities[:1], 5)
 
         response = client.get("/api/transfer/jobs?limit=3")
         assert response.status_code == 200
@@ -498,26 +528,9 @@ class TestTransferJobAPIs:
         response = client.get("/api/transfer/jobs/99999")
         assert response.status_code == 404
 
-    def test_get_job_success(self, client, monkeypatch, sample_activities):
+    def test_get_job_success(self, client, queue_service, sample_activities):
         """Test getting job details."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = sample_activities
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
-
-        # Create a job
-        create_response = client.post(
-            "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
-            content_type="application/json",
-        )
-        job_id = create_response.get_json()["job_id"]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
 
         response = client.get(f"/api/transfer/jobs/{job_id}")
         assert response.status_code == 200
@@ -527,31 +540,30 @@ class TestTransferJobAPIs:
         assert data["job"]["id"] == job_id
         assert len(data["items"]) == 3
 
+    def test_get_job_items_page(self, client, queue_service, sample_activities):
+        """Test paging and trimming job items through the API."""
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
+
+        response = client.get(
+            f"/api/transfer/jobs/{job_id}?items_limit=2&fields=label_id,status"
+        )
+        items = response.get_json()["items"]
+        assert [set(item) for item in items] == [{"id", "label_id", "status"}] * 2
+
+        response = client.get(f"/api/transfer/jobs/{job_id}?after_id={items[-1]['id']}")
+        assert [item["label_id"] for item in response.get_json()["items"]] == ["activity-003"]
+
+        response = client.get(f"/api/transfer/jobs/{job_id}?fields=password")
+        assert response.status_code == 400
+
     def test_delete_job_not_found(self, client):
         """Test deleting non-existent job."""
         response = client.delete("/api/transfer/jobs/99999")
         assert response.status_code == 404
 
-    def test_delete_job_success(self, client, monkeypatch, sample_activities):
+    def test_delete_job_success(self, client, queue_service, sample_activities):
         """Test deleting a job."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = sample_activities
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
-
-        # Create a job
-        create_response = client.post(
-            "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
-            content_type="application/json",
-        )
-        job_id = create_response.get_json()["job_id"]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
 
         response = client.delete(f"/api/transfer/jobs/{job_id}")
         assert response.status_code == 200
@@ -565,26 +577,9 @@ class TestTransferJobAPIs:
         response = client.post("/api/transfer/jobs/99999/cancel")
         assert response.status_code == 400
 
-    def test_cancel_job_success(self, client, monkeypatch, sample_activities):
+    def test_cancel_job_success(self, client, queue_service, sample_activities):
         """Test cancelling a job."""
-        mock_coros = MagicMock()
-        mock_coros.get_activities.return_value = sample_activities
-        mock_garmin = MagicMock()
-
-        mock_service = MagicMock()
-        mock_service.get_client.side_effect = lambda p: mock_coros if p == "coros" else mock_garmin
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_service.get_client,
-        )
-
-        # Create a job
-        create_response = client.post(
-            "/api/transfer/jobs",
-            json={"start_date": "2024-01-15", "end_date": "2024-01-15"},
-            content_type="application/json",
-        )
-        job_id = create_response.get_json()["job_id"]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", sample_activities)
 
         response = client.post(f"/api/transfer/jobs/{job_id}/cancel")
         assert response.status_code == 200
@@ -1,12 +1,15 @@
 """Tests for transfer worker service and worker control APIs."""
 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from fitness_toolkit.database import init_db, save_account
+from fitness_toolkit.database import save_account
 from fitness_toolkit.crypto import encrypt_password
 from fitness_toolkit.services.transfer_queue import (
     TransferQueueService,
@@ -19,28 +22,30 @@ from fitness_toolkit.services.transfer_queue import (
     ITEM_STATUS_FAILED,
     METADATA_STATUS_SUCCESS,
 )
+from fitness_toolkit.services.transfer_settings import TransferSettingsService
 from fitness_toolkit.services.transfer_worker import (
     TransferWorker,
+    _parse_coros_time,
     get_worker,
     reset_worker,
 )
-from fitness_toolkit.web.app import create_app
+
+
+# Minimal 14-byte FIT header: size, protocol, profile, data size, ".FIT", CRC
+FIT_HEADER = bytes([14, 0x10, 0, 0, 0, 0, 0, 0]) + b".FIT" + b"\x00\x00"
+
+
+def _write_fit(label_id, sport_type, file_format, save_path):
+    """Stand-in for CorosClient.download_activity that writes a FIT header."""
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    save_path.write_bytes(FIT_HEADER)
+    return save_path
 
 
 @pytest.fixture
-def db_path(tmp_path, monkeypatch):
-    """Set up temp database."""
-    db_file = tmp_path / "test_fitness.db"
-    monkeypatch.setattr("fitness_toolkit.config.Config.DATABASE_PATH", db_file)
-    monkeypatch.setattr("fitness_toolkit.database.Config.DATABASE_PATH", db_file)
-    
-    # Also patch downloads dir
-    downloads_dir = tmp_path / "downloads"
-    downloads_dir.mkdir()
-    monkeypatch.setattr("fitness_toolkit.config.Config.DOWNLOADS_DIR", downloads_dir)
-    
-    init_db()
-    return db_file
+def db_path(file_db_path):
+    """The worker reaches the database from several threads; use a file."""
+    return file_db_path
 
 
 @pytest.fixture
@@ -58,13 +63,20 @@ def queue_service(db_path):
 
 
 @pytest.fixture
-def client(db_path):
-    """Create test client with isolated database."""
-    reset_worker()  # Reset global worker for each test
-    app = create_app(testing=True)
-    with app.test_client() as test_client:
-        yield test_client
-    reset_worker()  # Cleanup
+def started_worker(db_path):
+    """A running TransferWorker, stopped (and joined) after the test."""
+    worker = TransferWorker()
+    worker.start()
+    yield worker
+    worker.stop(wait=True, timeout=5.0)
+
+
+@pytest.fixture
+def client(client):
+    """Shared test client, with the global worker reset around the test."""
+    reset_worker()
+    yield client
+    reset_worker()
 
 
 @pytest.fixture
@@ -106,34 +118,98 @@ class TestTransferWorker:
         assert worker.stop(wait=True, timeout=5.0)
         assert not worker.is_running
 
-    def test_worker_double_start(self, db_path):
-        """Test that starting an already running worker returns False."""
+    def test_metadata_pool_lives_with_worker_loop(self, db_path):
+        """Test that the metadata pool exists only while the worker loop runs."""
         worker = TransferWorker()
-        
+        assert worker._metadata_executor is None
+
         worker.start()
-        assert not worker.start()  # Second start should fail
-        
-        worker.stop()
+        assert worker.stop(wait=True, timeout=5.0)
+        assert worker._metadata_executor is None
 
-    def test_worker_pause_resume(self, db_path):
-        """Test pausing and resuming worker."""
+    def test_gear_linked_inline_without_worker_loop(self, db_path):
+        """Test that metadata reruns (no worker loop) still link gear."""
         worker = TransferWorker()
-        
-        worker.start()
-        
-        assert worker.pause()
-        assert worker.is_paused
-        
-        assert worker.resume()
-        assert not worker.is_paused
-        
-        worker.stop()
+        settings = {"gear": {"enabled": True, "gear_id": "gear-1"}}
+
+        with patch.object(worker, "_link_gear", return_value=True) as link_gear:
+            status, error = worker._apply_metadata(
+                MagicMock(), "garmin-1", {"activity_name": "Run"}, settings, {}
+            )
+
+        link_gear.assert_called_once()
+        assert (status, error) == (METADATA_STATUS_SUCCESS, None)
+
+    def test_worker_double_start(self, started_worker):
+        """Test that starting an already running worker returns False."""
+        assert not started_worker.start()  # Second start should fail
+
+    def test_worker_pause_resume(self, started_worker):
+        """Test pausing and resuming worker."""
+        assert started_worker.pause()
+        assert started_worker.is_paused
+
+        assert started_worker.resume()
+        assert not started_worker.is_paused
+
+    def test_pause_cuts_retry_backoff_short(self, started_worker, monkeypatch):
+        """Test that an item sleeping between retries returns once paused."""
+        queue_service = started_worker.queue_service
+        job_id = queue_service.create_job(
+            "2024-01-15",
+            "2024-01-15",
+            [{"labelId": "activity-001", "sportType": 100, "name": "Run", "startTime": ""}],
+        )
+        item = queue_service.get_job_items(job_id)[0]
+        # Always back off for the full (long) delay
+        monkeypatch.setattr("fitness_toolkit.services.transfer_worker.random.random", lambda: 1.0)
+        failed = threading.Event()
+
+        def _download_fails(*args):
+            failed.set()
+            raise Exception("COROS unavailable")
+
+        coros = MagicMock()
+        coros.download_activity.side_effect = _download_fails
+        result = []
+        item_thread = threading.Thread(
+            target=lambda: result.append(
+                started_worker._process_single_item(
+                    item, coros, MagicMock(), {}, {}, 3, 60.0, 60.0
+                )
+            )
+        )
+        item_thread.start()
+        assert failed.wait(timeout=5.0)
+
+        started_worker.pause()
+        item_thread.join(timeout=5.0)
+
+        assert not item_thread.is_alive()
+        assert result == [False]
+        assert coros.download_activity.call_count == 1
 
     def test_worker_pause_not_running(self, db_path):
         """Test that pausing a non-running worker returns False."""
         worker = TransferWorker()
         assert not worker.pause()
 
+    def test_credentials_decrypted_once(self, setup_accounts, monkeypatch):
+        """Test that account credentials are cached between client logins."""
+        from fitness_toolkit.services import transfer_worker
+
+        calls = []
+        monkeypatch.setattr(
+            transfer_worker,
+            "decrypt_password",
+            lambda value: calls.append(value) or "testpass",
+        )
+        worker = TransferWorker()
+
+        assert worker._get_credentials("coros") == ("test@coros.com", "testpass")
+        assert worker._get_credentials("coros") == ("test@coros.com", "testpass")
+        assert len(calls) == 1
+
     def test_process_job_not_found(self, db_path, queue_service):
         """Test processing non-existent job."""
         worker = TransferWorker(queue_service=queue_service)
@@ -155,30 +231,30 @@ class TestWorkerJobProcessing:
 
         # Mock the client creation
         mock_coros = MagicMock()
-        mock_coros.download_activity.return_value = tmp_path / "test.fit"
+        mock_coros.download_activity.side_effect = _write_fit
         
         mock_garmin = MagicMock()
         mock_garmin.upload_fit.return_value = "garmin-123"
         mock_garmin._set_activity_name.return_value = True
 
         # Make sure upload_fit accepts the new start_time kwarg
+        uploaded = threading.Event()
+
         def _upload_fit(file_path, activity_name=None, start_time=None):
+            uploaded.set()
             return "garmin-123"
 
         mock_garmin.upload_fit.side_effect = _upload_fit
 
-        # Create test file
-        (tmp_path / "test.fit").write_bytes(b"fake fit data")
-
         worker = TransferWorker(queue_service=queue_service)
 
         with patch.object(worker, '_create_coros_client', return_value=mock_coros):
             with patch.object(worker, '_create_garmin_client', return_value=mock_garmin):
                 # Start processing
                 worker.process_job(job_id)
-                
-                # Wait a bit for processing
-                time.sleep(0.5)
+
+                # Wait until the worker has uploaded something
+                assert uploaded.wait(timeout=5.0)
                 worker.stop(wait=True, timeout=5.0)
 
         # Check job status
@@ -186,6 +262,173 @@ class TestWorkerJobProcessing:
         # Job should be completed or still running depending on timing
         assert job["status"] in (JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED)
 
+    def test_worker_reuses_clients_across_items(self, db_path, setup_accounts, queue_service, tmp_path):
+        """Test that items share pooled clients instead of logging in per item."""
+        activities = [
+            {"labelId": f"activity-{i:03d}", "sportType": 100, "name": "Run", "startTime": ""}
+            for i in range(6)
+        ]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", activities)
+
+        mock_coros = MagicMock()
+        mock_coros.download_activity.side_effect = _write_fit
+        mock_garmin = MagicMock()
+        mock_garmin.upload_fit.return_value = "garmin-123"
+
+        worker = TransferWorker(queue_service=queue_service)
+        with patch.object(worker, "_create_coros_client", return_value=mock_coros) as create_coros:
+            with patch.object(worker, "_create_garmin_client", return_value=mock_garmin):
+                worker.process_job(job_id)
+                deadline = time.monotonic() + 5.0
+                while time.monotonic() < deadline:
+                    if queue_service.get_job(job_id)["status"] == JOB_STATUS_COMPLETED:
+                        break
+                    time.sleep(0.05)
+                worker.stop(wait=True, timeout=5.0)
+
+        assert queue_service.get_job(job_id)["status"] == JOB_STATUS_COMPLETED
+        # One login to verify credentials plus at most one per extra worker thread
+        concurrency = queue_service.get_job(job_id)["settings_snapshot"]["concurrency"]
+        assert create_coros.call_count <= concurrency + 1
+
+    def test_worker_runs_serial_job_inline(self, db_path, setup_accounts, queue_service, tmp_path):
+        """Test that a concurrency-1 job runs on the calling thread without the pool."""
+        TransferSettingsService().save_settings({"concurrency": 1})
+        activities = [
+            {"labelId": f"activity-{i:03d}", "sportType": 100, "name": "Run", "startTime": ""}
+            for i in range(3)
+        ]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", activities)
+
+        mock_coros = MagicMock()
+        mock_coros.download_activity.side_effect = _write_fit
+        mock_garmin = MagicMock()
+        mock_garmin.upload_fit.return_value = "garmin-123"
+
+        worker = TransferWorker(queue_service=queue_service)
+        with patch.object(worker, "_create_coros_client", return_value=mock_coros) as create_coros:
+            with patch.object(worker, "_create_garmin_client", return_value=mock_garmin):
+                worker._process_single_job(queue_service.get_job(job_id))
+
+        assert queue_service.get_job(job_id)["status"] == JOB_STATUS_COMPLETED
+        assert mock_garmin.upload_fit.call_count == 3
+        assert create_coros.call_count == 1
+
+    def test_serial_job_continues_after_client_creation_error(
+        self, db_path, setup_accounts, queue_service, tmp_path
+    ):
+        """Test that an item whose client login raises fails alone in serial mode."""
+        TransferSettingsService().save_settings(
+            {"concurrency": 1, "retry": {"max_attempts": 1}}
+        )
+        activities = [
+            {"labelId": f"activity-{i:03d}", "sportType": 100, "name": "Run", "startTime": ""}
+            for i in range(3)
+        ]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", activities)
+
+        mock_coros = MagicMock()
+        mock_coros.download_activity.side_effect = _write_fit
+        mock_garmin = MagicMock()
+        # The first item fails, so its client pair is dropped and the second
+        # item has to log in again, which raises
+        mock_garmin.upload_fit.side_effect = [None, "garmin-123"]
+        create_coros = MagicMock(
+            side_effect=[mock_coros, RuntimeError("login exploded"), mock_coros]
+        )
+
+        worker = TransferWorker(queue_service=queue_service)
+        with patch.object(worker, "_create_coros_client", create_coros):
+            with patch.object(worker, "_create_garmin_client", return_value=mock_garmin):
+                worker._process_single_job(queue_service.get_job(job_id))
+
+        assert queue_service.get_job(job_id)["status"] == JOB_STATUS_COMPLETED
+        assert mock_garmin.upload_fit.call_count == 2
+        last_item = queue_service.get_job_items(job_id)[-1]
+        assert last_item["status"] == ITEM_STATUS_SUCCESS
+
+    def test_cancel_mid_job_stops_uploads(
+        self, db_path, setup_accounts, queue_service, tmp_path
+    ):
+        """Test that prefetched items failed by a cancel are not uploaded."""
+        activities = [
+            {"labelId": f"activity-{i:03d}", "sportType": 100, "startTime": ""}
+            for i in range(12)
+        ]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", activities)
+
+        mock_coros = MagicMock()
+        mock_coros.download_activity.side_effect = _write_fit
+        mock_garmin = MagicMock()
+
+        def _upload_and_cancel(file_path, activity_name=None, start_time=None):
+            queue_service.cancel_job(job_id)
+            return "garmin-123"
+
+        mock_garmin.upload_fit.side_effect = _upload_and_cancel
+
+        worker = TransferWorker(queue_service=queue_service)
+        worker._executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            with (
+                patch.object(worker, "_create_coros_client", return_value=mock_coros),
+                patch.object(worker, "_create_garmin_client", return_value=mock_garmin),
+            ):
+                worker._process_single_job(queue_service.get_job(job_id))
+        finally:
+            worker._executor.shutdown(wait=True)
+
+        # Only the first window (concurrency 2) was claimed before the cancel
+        assert mock_garmin.upload_fit.call_count <= 2
+        statuses = [item["status"] for item in queue_service.get_job_items(job_id)]
+        assert statuses.count(ITEM_STATUS_FAILED) >= 10
+
+    def test_item_complete_callback_receives_finished_item(
+        self, db_path, setup_accounts, queue_service, tmp_path
+    ):
+        """Test that the item callback gets the item that just finished."""
+        TransferSettingsService().save_settings({"concurrency": 1})
+        activities = [
+            {"labelId": f"activity-{i:03d}", "sportType": 100, "name": "Run", "startTime": ""}
+            for i in range(2)
+        ]
+        job_id = queue_service.create_job("2024-01-15", "2024-01-15", activities)
+
+        mock_coros = MagicMock()
+        mock_coros.download_activity.side_effect = _write_fit
+        mock_garmin = MagicMock()
+        mock_garmin.upload_fit.return_value = "garmin-123"
+
+        completed = []
+        worker = TransferWorker(queue_service=queue_service)
+        worker._on_item_complete = lambda item_id, item: completed.append((item_id, item))
+        with patch.object(worker, "_create_coros_client", return_value=mock_coros):
+            with patch.object(worker, "_create_garmin_client", return_value=mock_garmin):
+                worker._process_single_job(queue_service.get_job(job_id))
+
+        assert [item["label_id"] for _, item in completed] == ["activity-000", "activity-001"]
+        for item_id, item in completed:
+            assert item["id"] == item_id
+            assert item["status"] == ITEM_STATUS_SUCCESS
+            assert item["garmin_id"] == "garmin-123"
+
+    def test_ensure_fit_file_replaces_corrupt_download(self, db_path, tmp_path):
+        """Test that a corrupt cached file is re-downloaded and a valid one reused."""
+        fit_path = tmp_path / "downloads" / "coros" / "100" / "activity-001.fit"
+        fit_path.parent.mkdir(parents=True)
+        fit_path.write_bytes(b"truncated")
+
+        mock_coros = MagicMock()
+        mock_coros.download_activity.side_effect = _write_fit
+        worker = TransferWorker()
+
+        worker._ensure_fit_file(mock_coros, "activity-001", 100, fit_path)
+        worker._ensure_fit_file(mock_coros, "activity-001", 100, fit_path)
+
+        assert fit_path.read_bytes() == FIT_HEADER
+        assert not fit_path.with_name("activity-001.fit.part").exists()
+        assert mock_coros.download_activity.call_count == 1
+
 
 class TestWorkerControlAPIs:
     """Tests for worker control web APIs."""
@@ -266,6 +509,36 @@ class TestGarminClientRefactored:
     """Tests for refactored GarminClient."""
 
 
+@pytest.mark.parametrize(
+    "rendered, rename_results, expected_names",
+    [
+        ("", [True], ["Morning Run"]),
+        ("Run 2024-01-15", [False, True], ["Run 2024-01-15", "Morning Run"]),
+    ],
+)
+def test_apply_metadata_falls_back_to_coros_name(
+    db_path, rendered, rename_results, expected_names
+):
+    """Test that the COROS name is applied when the title template gives none."""
+    worker = TransferWorker()
+    title_renderer = MagicMock()
+    title_renderer.render.return_value = rendered
+    garmin = MagicMock()
+    garmin._set_activity_name.side_effect = rename_results
+    item = {
+        "label_id": "x",
+        "sport_type": 100,
+        "activity_name": "Morning Run",
+        "activity_time": "2024-01-15 08:30:00",
+    }
+
+    worker._apply_metadata(garmin, "garmin-1", item, {}, {"title": title_renderer})
+
+    assert [c.args for c in garmin._set_activity_name.call_args_list] == [
+        ("garmin-1", name) for name in expected_names
+    ]
+
+
 def test_metadata_context_parses_epoch_start_time(db_path):
     """Ensure worker context can parse COROS epoch startTime."""
     worker = TransferWorker()
@@ -293,3 +566,19 @@ def test_metadata_context_parses_epoch_start_time(db_path):
         
         # Accessing client property should create instance
         # (We don't actually test this as it would try to connect)
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("2024-01-15 08:30:00", datetime(2024, 1, 15, 8, 30)),
+        ("2024-1-5 08:30:00", datetime(2024, 1, 5, 8, 30)),
+        (1705307400000, datetime.fromtimestamp(1705307400)),
+        ("1705307400", datetime.fromtimestamp(1705307400)),
+        ("", None),
+        ("not a time", None),
+    ],
+)
+def test_parse_coros_time(raw, expected):
+    """Ensure COROS start times parse from epoch values and strings."""
+    assert _parse_coros_time(raw) == expected
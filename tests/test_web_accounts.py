@@ -1,27 +1,17 @@
 """Tests for web account management."""
 
+from unittest.mock import MagicMock
+
 import pytest
+from flask import jsonify
 
 from fitness_toolkit.web.app import create_app
 
 
-@pytest.fixture
-def client():
-    """Create test client."""
-    app = create_app()
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        yield client
-
-
-def test_index_page(client):
-    """Test index page loads successfully."""
-    response = client.get("/")
-    assert response.status_code == 200
-    assert b"Fitness Toolkit" in response.data
-    assert "账号管理".encode() in response.data
-    assert "下载数据".encode() in response.data
-    assert "定时任务".encode() in response.data
+@pytest.mark.parametrize("needle", ["Fitness Toolkit", "账号管理", "下载数据", "定时任务", "同步到佳明"])
+def test_index_page(index_html, needle):
+    """Test index page has every section (accounts, download, tasks, transfer)."""
+    assert needle.encode() in index_html
 
 
 def test_list_accounts_api(client):
@@ -31,3 +21,88 @@ def test_list_accounts_api(client):
     data = response.get_json()
     assert "accounts" in data
     assert isinstance(data["accounts"], list)
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ({"platform": "coros", "email": "test@example.com"}, "password are required"),
+        ({"platform": "coros", "email": "test@example.com", "password": 1234}, "password must be a string"),
+        ({"platform": None, "email": "test@example.com", "password": "x"}, "platform must be a string"),
+    ],
+)
+def test_add_account_validates_body(client, body, message):
+    """Test that missing or mistyped account fields are rejected up front."""
+    response = client.post("/api/accounts", json=body)
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+
+
+def test_list_accounts_cache_invalidated_on_change(client):
+    """Test that the cached account list is refreshed after adding or deleting."""
+    assert client.get("/api/accounts").get_json()["accounts"] == []
+
+    response = client.post(
+        "/api/accounts",
+        json={"platform": "coros", "email": "test@example.com", "password": "secret"},
+    )
+    assert response.status_code == 201
+    accounts = client.get("/api/accounts").get_json()["accounts"]
+    assert [a["platform"] for a in accounts] == ["coros"]
+
+    assert client.delete("/api/accounts/coros").status_code == 200
+    assert client.get("/api/accounts").get_json()["accounts"] == []
+
+
+def test_index_page_revalidates_with_etag(client):
+    """Test that the cached home page answers conditional requests with 304."""
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+    revalidated = client.get("/", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+
+def test_account_list_revalidates_with_etag(client):
+    """Test that an unchanged account list answers If-None-Match with 304."""
+    response = client.get("/api/accounts")
+    assert response.status_code == 200
+
+    revalidated = client.get(
+        "/api/accounts", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_routes_skip_automatic_options(client):
+    """Test that API routes do not answer OPTIONS automatically."""
+    assert client.options("/api/accounts").status_code == 405
+
+
+def test_json_responses_unsorted_and_compact(db_path):
+    """Test that API responses keep insertion order and skip indentation."""
+    app = create_app(testing=True)
+    app.debug = True
+    with app.test_request_context():
+        body = jsonify({"b": 1, "a": 2}).get_data(as_text=True)
+    assert body.strip() == '{"b":1,"a":2}'
+
+
+def test_serve_prefers_waitress(monkeypatch):
+    """Test that serve() uses waitress when installed and app.run otherwise."""
+    import fitness_toolkit.web.app as app_module
+
+    app = MagicMock()
+    fake_waitress = MagicMock()
+    monkeypatch.setattr(app_module, "waitress", fake_waitress)
+    app_module.serve(app, "127.0.0.1", 5000)
+    fake_waitress.serve.assert_called_once_with(
+        app, host="127.0.0.1", port=5000, threads=app_module.SERVER_THREADS
+    )
+    app.run.assert_not_called()
+
+    monkeypatch.setattr(app_module, "waitress", None)
+    app_module.serve(app, "127.0.0.1", 5000)
+    app.run.assert_called_once_with(host="127.0.0.1", port=5000, debug=False, threaded=True)
@@ -0,0 +1,42 @@
+"""Tests for the web TTL cache."""
+
+from fitness_toolkit.web import cache as cache_module
+from fitness_toolkit.web.cache import TTLCache
+
+
+def test_get_returns_cached_value():
+    """Test that a stored value is returned until deleted."""
+    cache = TTLCache()
+    cache.set("tasks", [{"platform": "coros"}])
+
+    assert cache.get("tasks") == [{"platform": "coros"}]
+    cache.delete("tasks", "missing")
+    assert cache.get("tasks") is None
+
+
+def test_entries_expire(monkeypatch):
+    """Test that entries are dropped once their timeout passes."""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(default_timeout=30)
+    cache.set("accounts", [])
+    cache.set("tasks", [], timeout=5)
+
+    now[0] += 10
+    assert cache.get("accounts") == []
+    assert cache.get("tasks") is None
+
+    now[0] += 30
+    assert cache.get("accounts") is None
+
+
+def test_set_evicts_oldest_when_full():
+    """Test that the cache stays within maxsize."""
+    cache = TTLCache(maxsize=2)
+    cache.set(("download", 50), [])
+    cache.set(("transfer", 50), [])
+    cache.set(("transfer", 10), [])
+
+    assert cache.get(("download", 50)) is None
+    assert cache.get(("transfer", 50)) == []
+    assert cache.get(("transfer", 10)) == []
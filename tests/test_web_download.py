@@ -1,26 +1,13 @@
 """Tests for web download functionality."""
 
+import sqlite3
+
 import pytest
 
+from fitness_toolkit.database import get_operation_history, save_operation_history
 from fitness_toolkit.web.app import create_app
 
 
-@pytest.fixture
-def client():
-    """Create test client."""
-    app = create_app()
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        yield client
-
-
-def test_download_page_loads(client):
-    """Test download page loads successfully."""
-    response = client.get("/")
-    assert response.status_code == 200
-    assert "下载数据".encode() in response.data
-
-
 def test_download_api_requires_account(client):
     """Test download API requires valid account."""
     response = client.post(
@@ -34,3 +21,76 @@ def test_download_api_requires_account(client):
     )
     # Should fail because account is not configured
     assert response.status_code == 400
+
+
+def test_history_cache_cleared_on_delete(client):
+    """Test that cached history is refreshed after a record is deleted."""
+    save_operation_history("download", "coros", "2024-01-01", "2024-01-31", 1, 1, 0, 0)
+
+    history = client.get("/api/history/download").get_json()["history"]
+    assert len(history) == 1
+
+    response = client.delete(f"/api/history/download/{history[0]['id']}")
+    assert response.status_code == 200
+    assert client.get("/api/history/download").get_json()["history"] == []
+
+
+def test_queued_history_visible_to_next_read(file_db_path):
+    """Test that history queued for the batch writer is returned right away."""
+    app = create_app(testing=True)
+    writer = app.extensions["fitness_toolkit"]["history_writer"]
+    writer.start()
+
+    try:
+        with app.test_client() as client:
+            assert client.get("/api/history/download").get_json()["history"] == []
+            writer.put(
+                operation_type="download", platform="coros",
+                start_date="2024-01-01", end_date="2024-01-31",
+                total=1, success=1, skipped=0, failed=0,
+            )
+            history = client.get("/api/history/download").get_json()["history"]
+            assert [record["platform"] for record in history] == ["coros"]
+    finally:
+        writer.stop()
+
+
+def test_history_written_synchronously_when_testing(db_path):
+    """Test that testing apps save history without a background thread."""
+    app = create_app(testing=True)
+    writer = app.extensions["fitness_toolkit"]["history_writer"]
+
+    writer.put(
+        operation_type="transfer", platform="coros->garmin",
+        start_date="2024-01-01", end_date="2024-01-31",
+        total=0, success=0, skipped=0, failed=0,
+    )
+
+    assert [record["platform"] for record in get_operation_history("transfer")] == [
+        "coros->garmin"
+    ]
+
+
+def test_history_kept_when_batch_write_fails(db_path, monkeypatch):
+    """Test that records from a failed write are retried on the next flush."""
+    import fitness_toolkit.web.history as history_module
+
+    writer = history_module.HistoryWriter()
+    save_many = history_module.save_operation_history_many
+
+    def locked(rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(history_module, "save_operation_history_many", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.put(
+            operation_type="download", platform="coros",
+            start_date="2024-01-01", end_date="2024-01-31",
+            total=1, success=1, skipped=0, failed=0,
+        )
+
+    monkeypatch.setattr(history_module, "save_operation_history_many", save_many)
+    assert writer.flush() == 1
+    assert [record["platform"] for record in get_operation_history("download")] == [
+        "coros"
+    ]
@@ -1,26 +1,12 @@
 """Tests for web scheduler functionality."""
 
+from unittest.mock import MagicMock
+
 import pytest
 
 from fitness_toolkit.web.app import create_app
 
 
-@pytest.fixture
-def client():
-    """Create test client."""
-    app = create_app()
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        yield client
-
-
-def test_scheduler_page_loads(client):
-    """Test scheduler page loads successfully."""
-    response = client.get("/")
-    assert response.status_code == 200
-    assert "定时任务".encode() in response.data
-
-
 def test_list_tasks_api(client):
     """Test list tasks API."""
     response = client.get("/api/tasks")
@@ -28,3 +14,36 @@ def test_list_tasks_api(client):
     data = response.get_json()
     assert "tasks" in data
     assert isinstance(data["tasks"], list)
+
+
+@pytest.mark.parametrize(
+    "method, path, action",
+    [
+        ("post", "/api/tasks/1/enable", "enable_task"),
+        ("post", "/api/tasks/1/disable", "disable_task"),
+        ("delete", "/api/tasks/1", "delete_task"),
+    ],
+)
+def test_task_actions(db_path, monkeypatch, method, path, action):
+    """Test that each task action calls the scheduler and reports the outcome."""
+    mock_scheduler = MagicMock()
+    monkeypatch.setattr("fitness_toolkit.web.app.SchedulerService", lambda: mock_scheduler)
+    app = create_app(testing=True)
+
+    with app.test_client() as client:
+        getattr(mock_scheduler, action).return_value = True
+        response = getattr(client, method)(path)
+        assert response.status_code == 200
+        assert "successfully" in response.get_json()["message"]
+        getattr(mock_scheduler, action).assert_called_once_with(1)
+
+        getattr(mock_scheduler, action).return_value = False
+        assert getattr(client, method)(path).status_code == 404
+
+
+def test_testing_app_starts_no_background_threads(app):
+    """Test that a testing app leaves the scheduler and history writer idle."""
+    services = app.extensions["fitness_toolkit"]
+    if services["scheduler"] is not None:
+        assert not services["scheduler"].scheduler.running
+    assert services["history_writer"]._thread is None
@@ -1,32 +1,10 @@
 """Tests for web transfer functionality."""
 
+import json
 from unittest.mock import MagicMock
 
 import pytest
 
-from fitness_toolkit.web.app import create_app
-
-
-@pytest.fixture
-def client(monkeypatch):
-    """Create test client with mocked scheduler."""
-    # Mock scheduler to avoid background thread issues in tests
-    mock_scheduler = MagicMock()
-    monkeypatch.setattr(
-        "fitness_toolkit.web.app.SchedulerService", lambda: mock_scheduler
-    )
-
-    app = create_app()
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        yield client
-
-
-def test_transfer_page_loads(client):
-    """Test transfer page loads successfully."""
-    response = client.get("/")
-    assert response.status_code == 200
-    assert "同步到佳明".encode() in response.data
 
 
 def test_transfer_api_success(client, monkeypatch):
@@ -51,7 +29,8 @@ def test_transfer_api_success(client, monkeypatch):
     mock_transfer_service = MagicMock()
     mock_transfer_service.transfer.return_value = mock_result
     monkeypatch.setattr(
-        "fitness_toolkit.web.app.TransferService", lambda: mock_transfer_service
+        "fitness_toolkit.web.app.TransferService",
+        lambda **kwargs: mock_transfer_service,
     )
 
     response = client.post(
@@ -80,6 +59,17 @@ def test_transfer_api_missing_dates(client):
     assert "end_date" in data["error"].lower()
 
 
+def test_transfer_api_malformed_json(client):
+    """Test transfer API rejects a body that is not valid JSON."""
+    response = client.post(
+        "/api/transfer", data="{not json", content_type="application/json"
+    )
+
+    assert response.status_code == 400
+    data = response.get_json()
+    assert "request body" in data["error"].lower()
+
+
 def test_transfer_api_invalid_date_format(client):
     """Test transfer API validates date format."""
     response = client.post(
@@ -91,6 +81,18 @@ def test_transfer_api_invalid_date_format(client):
     assert "date format" in data["error"].lower()
 
 
+@pytest.mark.parametrize("start_date", ["2024-13-01", "2024-01", 20240101, None])
+def test_transfer_api_rejects_bad_dates(client, start_date):
+    """Test transfer API rejects impossible, partial and non-string dates."""
+    response = client.post(
+        "/api/transfer", json={"start_date": start_date, "end_date": "2024-01-31"}
+    )
+
+    assert response.status_code == 400
+    data = response.get_json()
+    assert "date format" in data["error"].lower()
+
+
 def test_transfer_api_invalid_date_range(client):
     """Test transfer API validates date range."""
     response = client.post(
@@ -123,7 +125,8 @@ def test_transfer_api_value_error(client, monkeypatch):
     mock_transfer_service = MagicMock()
     mock_transfer_service.transfer.side_effect = ValueError("COROS not configured")
     monkeypatch.setattr(
-        "fitness_toolkit.web.app.TransferService", lambda: mock_transfer_service
+        "fitness_toolkit.web.app.TransferService",
+        lambda **kwargs: mock_transfer_service,
     )
 
     response = client.post(
@@ -140,7 +143,8 @@ def test_transfer_api_exception(client, monkeypatch):
     mock_transfer_service = MagicMock()
     mock_transfer_service.transfer.side_effect = Exception("Network error")
     monkeypatch.setattr(
-        "fitness_toolkit.web.app.TransferService", lambda: mock_transfer_service
+        "fitness_toolkit.web.app.TransferService",
+        lambda **kwargs: mock_transfer_service,
     )
 
     response = client.post(
@@ -169,3 +173,48 @@ def test_transfer_history_api_invalid_type(client):
     assert response.status_code == 400
     data = response.get_json()
     assert "invalid" in data["error"].lower()
+
+
+def test_transfer_service_reused_across_requests(client, monkeypatch):
+    """Test that the transfer service is created once per app."""
+    mock_transfer_service = MagicMock()
+    mock_transfer_service.transfer.return_value = {"total": 0, "failed": []}
+    factory = MagicMock(return_value=mock_transfer_service)
+    monkeypatch.setattr("fitness_toolkit.web.app.TransferService", factory)
+
+    for _ in range(2):
+        response = client.post(
+            "/api/transfer", json={"start_date": "2024-01-01", "end_date": "2024-01-31"}
+        )
+        assert response.status_code == 200
+
+    assert factory.call_count == 1
+    assert mock_transfer_service.transfer.call_count == 2
+
+
+def test_transfer_api_streams_ndjson(client, monkeypatch):
+    """Test that transfer results stream as NDJSON when requested."""
+    activities = [
+        {"label_id": "123", "status": "success", "garmin_id": "456"},
+        {"label_id": "124", "status": "skipped", "garmin_id": "duplicate"},
+    ]
+    result = {"total": 2, "uploaded": 1, "skipped": 1, "failed": [], "activities": activities}
+    mock_transfer_service = MagicMock()
+    mock_transfer_service.iter_transfer.return_value = (result, iter(activities))
+    monkeypatch.setattr(
+        "fitness_toolkit.web.app.TransferService",
+        lambda **kwargs: mock_transfer_service,
+    )
+
+    response = client.post(
+        "/api/transfer",
+        json={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["activity"]["label_id"] for line in lines[:-1]] == ["123", "124"]
+    assert lines[-1]["result"]["uploaded"] == 1
+    mock_transfer_service.transfer.assert_not_called()
@@ -1,30 +1,43 @@
 """Tests for web transfer settings functionality."""
 
 import json
-from unittest.mock import MagicMock, patch
 
 import pytest
 
-from fitness_toolkit.web.app import create_app
+from fitness_toolkit.services.transfer_settings import TransferSettingsService
 
 
-@pytest.fixture
-def client(tmp_path, monkeypatch):
-    """Create test client with isolated database."""
-    # Use temp database
-    db_path = tmp_path / "test_fitness.db"
-    monkeypatch.setattr("fitness_toolkit.config.Config.DATABASE_PATH", db_path)
-    monkeypatch.setattr("fitness_toolkit.database.Config.DATABASE_PATH", db_path)
+# Label of the settings tab on the home page
+_SETTINGS_TAB_LABEL = "同步设置".encode()
 
-    app = create_app(testing=True)
-    with app.test_client() as test_client:
-        yield test_client
+# Preview request for a 10 km morning run
+_PREVIEW_RUN_BODY = json.dumps({
+    "activity": {
+        "labelId": "test123",
+        "sportType": 100,
+        "name": "Morning Run",
+        "startTime": "2024-01-15 08:30:00",
+        "duration": 3600,
+        "distance": 10000,
+    }
+})
+
+@pytest.fixture(scope="module")
+def default_settings():
+    """Expected values of the settings used before any are saved (read-only)."""
+    return {
+        "concurrency": 2,
+        "retry": {"max_attempts": 3},
+        "naming": {"title_template": "{sport} {start_local:%Y-%m-%d %H:%M}"},
+        "privacy": {"visibility": "default"},
+        "gear": {"enabled": False},
+    }
 
 
 class TestGetTransferSettings:
     """Tests for GET /api/settings/transfer."""
 
-    def test_get_settings_returns_defaults(self, client):
+    def test_get_settings_returns_defaults(self, client, default_settings):
         """Test that GET returns default settings when none exist."""
         response = client.get("/api/settings/transfer")
         assert response.status_code == 200
@@ -35,11 +48,11 @@ class TestGetTransferSettings:
         assert data["version"] == 1
 
         settings = data["settings"]
-        assert settings["concurrency"] == 2
-        assert settings["retry"]["max_attempts"] == 3
-        assert settings["naming"]["title_template"] == "{sport} {start_local:%Y-%m-%d %H:%M}"
-        assert settings["privacy"]["visibility"] == "default"
-        assert settings["gear"]["enabled"] is False
+        for key, expected in default_settings.items():
+            actual = settings[key]
+            if isinstance(expected, dict):
+                actual = {name: actual[name] for name in expected}
+            assert actual == expected
 
     def test_get_settings_returns_saved_settings(self, client):
         """Test that GET returns previously saved settings."""
@@ -118,43 +131,27 @@ class TestPutTransferSettings:
         data = response.get_json()
         assert "settings" in data["error"].lower()
 
-    def test_put_settings_validation_error_concurrency(self, client):
-        """Test validation error for invalid concurrency."""
-        response = client.put(
-            "/api/settings/transfer",
-            json={"settings": {"concurrency": 100}},
-            content_type="application/json",
-        )
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data["error"] == "validation_error"
-        assert "concurrency" in data["fields"]
-
-    def test_put_settings_validation_error_template(self, client):
-        """Test validation error for invalid template variable."""
-        response = client.put(
-            "/api/settings/transfer",
-            json={"settings": {"naming": {"title_template": "{invalid_var}"}}},
-            content_type="application/json",
-        )
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data["error"] == "validation_error"
-        assert "naming.title_template" in data["fields"]
-
-    def test_put_settings_validation_error_privacy(self, client):
-        """Test validation error for invalid privacy value."""
+    @pytest.mark.parametrize(
+        "body, field",
+        [
+            ({"settings": {"concurrency": 100}}, "concurrency"),
+            ({"settings": {"naming": {"title_template": "{invalid_var}"}}}, "naming.title_template"),
+            ({"settings": {"privacy": {"visibility": "invalid"}}}, "privacy.visibility"),
+        ],
+    )
+    def test_put_settings_validation_error(self, client, body, field):
+        """Test validation errors name the invalid field."""
         response = client.put(
             "/api/settings/transfer",
-            json={"settings": {"privacy": {"visibility": "invalid"}}},
+            json=body,
             content_type="application/json",
         )
         assert response.status_code == 400
         data = response.get_json()
         assert data["error"] == "validation_error"
-        assert "privacy.visibility" in data["fields"]
+        assert field in data["fields"]
 
-    def test_put_settings_partial_update(self, client):
+    def test_put_settings_partial_update(self, client, default_settings):
         """Test that partial updates merge with defaults."""
         response = client.put(
             "/api/settings/transfer",
@@ -167,7 +164,8 @@ class TestPutTransferSettings:
         # Should have the updated value
         assert data["settings"]["concurrency"] == 4
         # Should still have defaults for other fields
-        assert data["settings"]["retry"]["max_attempts"] == 3
+        assert data["settings"]["retry"]["max_attempts"] == default_settings["retry"]["max_attempts"]
+        assert data["settings"]["privacy"] == default_settings["privacy"]
 
 
 class TestPreviewTransferSettings:
@@ -177,16 +175,7 @@ class TestPreviewTransferSettings:
         """Test successful preview."""
         response = client.post(
             "/api/settings/transfer/preview",
-            json={
-                "activity": {
-                    "labelId": "test123",
-                    "sportType": 100,
-                    "name": "Morning Run",
-                    "startTime": "2024-01-15 08:30:00",
-                    "duration": 3600,
-                    "distance": 10000,
-                }
-            },
+            data=_PREVIEW_RUN_BODY,
             content_type="application/json",
         )
         assert response.status_code == 200
@@ -273,18 +262,43 @@ class TestPreviewTransferSettings:
         assert patch["privacy"]["typeKey"] == "private"
         assert patch["gear_id"] == "gear-uuid-123"
 
+    def test_preview_ignores_template_that_fails_to_compile(self, db_path, monkeypatch):
+        """Test that any error compiling a template drops it instead of raising."""
+        def broken(self):
+            raise KeyError("format spec")
+
+        monkeypatch.setattr(
+            "fitness_toolkit.services.transfer_settings.TemplateRenderer._validate_template",
+            broken,
+        )
+        service = TransferSettingsService()
+        activity = {"labelId": "a", "sportType": 100, "startTime": "2024-01-15 08:30:00"}
+
+        assert service.preview_batch([activity]) == [service.preview(activity)]
 
+    def test_preview_batch_matches_single_preview(self, client):
+        """Test that batch preview renders each activity like preview()."""
+        service = TransferSettingsService()
+        activities = [
+            {"labelId": "a", "sportType": 100, "startTime": "2024-01-15 08:30:00"},
+            {"labelId": "b", "sportType": 200, "startTime": "2024-01-16 09:00:00"},
+        ]
+
+        results = service.preview_batch(activities)
+
+        assert [r["rendered"] for r in results] == [
+            service.preview(a)["rendered"] for a in activities
+        ]
+        assert results[1]["rendered"]["title"] == "骑行 2024-01-16 09:00"
+
+
+@pytest.mark.gear
 class TestGarminGearEndpoint:
     """Tests for GET /api/garmin/gear."""
 
-    def test_gear_no_garmin_account(self, client, monkeypatch):
+    def test_gear_no_garmin_account(self, client, stub_accounts):
         """Test gear endpoint when Garmin not configured."""
-        mock_account_service = MagicMock()
-        mock_account_service.get_client.return_value = None
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_account_service.get_client,
-        )
+        del stub_accounts["garmin"]
 
         response = client.get("/api/garmin/gear")
         assert response.status_code == 200
@@ -293,76 +307,70 @@ class TestGarminGearEndpoint:
         assert data["gear"] == []
         assert "warning" in data
 
-    def test_gear_api_error(self, client, monkeypatch):
+    def test_gear_api_error(self, client, stub_accounts, monkeypatch):
         """Test gear endpoint when API fails."""
-        mock_client = MagicMock()
-        mock_account_service = MagicMock()
-        mock_account_service.get_client.return_value = mock_client
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_account_service.get_client,
-        )
+        def connectapi(path, **kwargs):
+            raise Exception("API Error")
 
-        # Mock garth.connectapi at the global level
-        with patch("garth.connectapi") as mock_connectapi:
-            mock_connectapi.side_effect = Exception("API Error")
+        monkeypatch.setattr("garth.connectapi", connectapi)
 
-            response = client.get("/api/garmin/gear")
-            assert response.status_code == 200
+        response = client.get("/api/garmin/gear")
+        assert response.status_code == 200
 
-            data = response.get_json()
-            assert data["gear"] == []
-            assert "warning" in data
+        data = response.get_json()
+        assert data["gear"] == []
+        assert "warning" in data
 
-    def test_gear_success(self, client, monkeypatch):
+    def test_gear_success(self, client, stub_accounts, monkeypatch):
         """Test gear endpoint success."""
-        mock_client = MagicMock()
-        mock_account_service = MagicMock()
-        mock_account_service.get_client.return_value = mock_client
-        monkeypatch.setattr(
-            "fitness_toolkit.services.account.AccountService.get_client",
-            mock_account_service.get_client,
-        )
+        gear = [
+            {
+                "uuid": "gear-1",
+                "displayName": "Running Shoes",
+                "gearTypeName": "Footwear",
+            },
+            {
+                "gearPk": "gear-2",
+                "customMakeModel": "Bike",
+                "gearTypeName": "Bicycle",
+            },
+        ]
+        monkeypatch.setattr("garth.connectapi", lambda path, **kwargs: gear)
 
-        # Mock garth.connectapi at the global level
-        with patch("garth.connectapi") as mock_connectapi:
-            mock_connectapi.return_value = [
-                {
-                    "uuid": "gear-1",
-                    "displayName": "Running Shoes",
-                    "gearTypeName": "Footwear",
-                },
-                {
-                    "gearPk": "gear-2",
-                    "customMakeModel": "Bike",
-                    "gearTypeName": "Bicycle",
-                },
-            ]
+        response = client.get("/api/garmin/gear")
+        assert response.status_code == 200
 
-            response = client.get("/api/garmin/gear")
-            assert response.status_code == 200
+        data = response.get_json()
+        assert len(data["gear"]) == 2
+        assert data["gear"][0]["id"] == "gear-1"
+        assert data["gear"][0]["name"] == "Running Shoes"
+        assert data["gear"][1]["id"] == "gear-2"
+
+    def test_gear_list_cached(self, client, stub_accounts, monkeypatch):
+        """Test that a fetched gear list is reused until accounts change."""
+        calls = []
+
+        def connectapi(path, **kwargs):
+            calls.append(path)
+            return [{"uuid": "gear-1", "displayName": "Shoes"}]
 
-            data = response.get_json()
-            assert len(data["gear"]) == 2
-            assert data["gear"][0]["id"] == "gear-1"
-            assert data["gear"][0]["name"] == "Running Shoes"
-            assert data["gear"][1]["id"] == "gear-2"
+        monkeypatch.setattr("garth.connectapi", connectapi)
+
+        first = client.get("/api/garmin/gear").get_json()
+        second = client.get("/api/garmin/gear").get_json()
+        assert first == second
+        assert len(calls) == 1
 
 
 class TestSettingsTabLoads:
     """Test that settings tab is present in UI."""
 
-    def test_settings_tab_in_page(self, client):
+    def test_settings_tab_in_page(self, index_html):
         """Test that settings tab button exists."""
-        response = client.get("/")
-        assert response.status_code == 200
-        assert "同步设置".encode() in response.data
+        assert _SETTINGS_TAB_LABEL in index_html
 
-    def test_settings_form_elements(self, client):
+    def test_settings_form_elements(self, index_html):
         """Test that settings form elements exist."""
-        response = client.get("/")
-        assert response.status_code == 200
-        html = response.data.decode()
-        assert "title_template" in html
-        assert "concurrency" in html
-        assert "max_attempts" in html
+        assert b"title_template" in index_html
+        assert b"concurrency" in index_html
+        assert b"max_attempts" in index_html